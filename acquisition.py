@@ -0,0 +1,78 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+from metrics import shared_metrics
+from devices import DeviceRegistry
+
+# Longest time a single acquisition waits for the sensors (seconds)
+SENSOR_TIMEOUT = 2.0
+
+
+class SensorSnapshot:
+    """Readings of every sensor taken in one pass, with the exception of each channel that failed."""
+
+    def __init__(self, timestamp, values, errors):
+        self.timestamp = timestamp
+        self.values = values
+        self.errors = errors
+
+
+class AcquisitionWorker(QObject):
+    """
+    Reads the sensors on its own QThread and publishes every SensorSnapshot through a queued signal.
+    Each sensor is read in a separate pool thread with a deadline, so a hung bus only marks
+    its channels as timed out until the stuck read returns.
+    """
+    snapshot_ready = pyqtSignal(object)
+
+    def __init__(self, drivers, timeout=SENSOR_TIMEOUT, metrics=None):
+        super().__init__()
+        self.timeout = timeout
+        self.metrics = metrics or shared_metrics()
+        self.drivers = {driver.name: driver for driver in drivers}
+        # Sensors are discovered on the first acquisition and then kept open
+        self.devices = DeviceRegistry(drivers, metrics=self.metrics)
+        self.executor = ThreadPoolExecutor(max_workers=len(self.drivers), thread_name_prefix="sensor")
+        self.stuck = {}
+
+    @pyqtSlot()
+    def acquire(self):
+        """Reads every sensor once and emits the resulting snapshot."""
+        timestamp = int(time.time())
+        values = {}
+        errors = {}
+        futures = {}
+        for sensor, driver in self.drivers.items():
+            if sensor in self.stuck and not self.stuck[sensor].done():
+                for channel in driver.channels:
+                    errors[channel] = TimeoutError(f"{sensor} has not answered the previous read yet")
+                self.metrics.increment("meteo_sensor_reads_skipped_total", sensor=sensor)
+                continue
+            self.stuck.pop(sensor, None)
+            futures[sensor] = self.executor.submit(self.read_sensor, sensor)
+
+        deadline = time.monotonic() + self.timeout
+        for sensor, future in futures.items():
+            try:
+                values.update(future.result(timeout=max(0.0, deadline - time.monotonic())))
+            except FutureTimeout:
+                self.stuck[sensor] = future
+                self.metrics.increment("meteo_sensor_read_failures_total", sensor=sensor, error="Timeout")
+                for channel in self.drivers[sensor].channels:
+                    errors[channel] = TimeoutError(f"{sensor} did not answer within {self.timeout} s")
+            except Exception as e:
+                for channel in self.drivers[sensor].channels:
+                    errors[channel] = e
+
+        self.snapshot_ready.emit(SensorSnapshot(timestamp, values, errors))
+
+    def read_sensor(self, sensor):
+        """Reads one sensor on a pool thread, recording how long it took and whether it failed."""
+        with self.metrics.timer("meteo_sensor_read_seconds", failures="meteo_sensor_read_failures_total",
+                                sensor=sensor):
+            return self.devices.read(sensor)
+
+    def shutdown(self):
+        """Stops the sensor pool without waiting for reads that are still hanging and releases the drivers."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.devices.close()
@@ -1,176 +1,65 @@
 from datetime import datetime
-from PyQt5.QtCore import QTimer
-
-""" Imports and declarations for Raspberry PI"""
-# from w1thermsensor import W1ThermSensor
-# from BME280 import BME280
-# import RPi.GPIO as GPIO
-# from smbus import SMBus
-# from w1thermsensor.errors import SensorNotReadyError, NoSensorFoundError
-#
-# BUS = SMBus(1)
-# BME280 = BME280(i2c_dev=BUS)
-# GPIO.setmode(GPIO.BOARD)
-# GPIO.setwarnings(False)
-# GPIO.setup(8, GPIO.IN)
-
-
-
-class Backend:
-    def __init__(self):
-        self.data = {
-            "room_temp_1h": [],
-            "outside_temp_1h": [],
-            "humidity_1h": [],
-            "pressure_1h": [],
-            "rain_1h": [],
-            "room_temp_24h": [],
-            "outside_temp_24h": [],
-            "humidity_24h": [],
-            "pressure_24h": [],
-            "rain_24h": [],
-        }
-
-        self.hours = {
-            "time_1h": [],
-            "hours_1h": [],
-            "time_24h": [],
-            "hours_24h": []
-        }
-
-        self.timer1 = QTimer()
-        self.timer1.start(180000)  # Updates every 3 minutes
-        self.timer1.timeout.connect(self.update_data)
-        self.errors = []
-        self.counter = 0
-        self.update_data()
-
-    def add_data(self, key, value, max_length):
-        """Adds a new data point to the specified data list, ensuring it does not exceed max_length."""
-        if len(self.data[key]) >= max_length:
-            self.data[key].pop(0)
-        self.data[key].append(value)
-
-    def add_time(self, key, max_length):
-        """Adds a timestamp or formatted hour to the corresponding time list, maintaining max_length."""
-        real_time = datetime.now()
-        reference_time = real_time.timestamp() / 10000000000
-
-        hour = real_time.strftime("%H.%M")
-        plot_hour = hour.replace(".", ":")
-
-        if len(self.hours[key]) >= max_length:
-            self.hours[key].pop(0)
-
-        if key in ["time_1h", "time_24h"]:
-            self.hours[key].append(reference_time)
-        elif key in ["hours_1h", "hours_24h"]:
-            self.hours[key].append(plot_hour)
-
-    def update_data(self):
-        """Loads weather data, updates hourly and daily logs, and stores time references."""
-        try:
-            room_temperature = BME280.get_temperature()
-            outside_temperature = W1ThermSensor().get_temperature()
-            pressure = BME280.get_pressure()
-            humidity = BME280.get_humidity()
-            if GPIO.input(8) == GPIO.LOW:
-                rain = 1
-            else:
-                rain = 0
-
-            self.add_data("room_temp_1h", room_temperature, 20)
-            self.add_data("outside_temp_1h", outside_temperature, 20)
-            self.add_data("humidity_1h", humidity, 20)
-            self.add_data("pressure_1h", pressure, 20)
-            self.add_data("rain_1h", rain, 20)
-            self.add_time("hours_1h", 20)
-            self.add_time("time_1h", 20)
-            self.counter += 1
-            print(self.counter)
-
-            if self.counter == 1 or self.counter % 10 == 0:
-                self.add_data("room_temp_24h", room_temperature, 20)
-                self.add_data("outside_temp_24h", outside_temperature, 20)
-                self.add_data("humidity_24h", humidity, 20)
-                self.add_data("pressure_24h", pressure, 20)
-                self.add_data("rain_24h", rain, 20)
-                self.add_time("hours_24h", 20)
-                self.add_time("time_24h", 20)
-        except Exception as e:
-            now = datetime.now()
-            formatted_now = now.strftime("%Y-%m-%d %H:%M")
-            error_message = (f"At {formatted_now} {type(e).__name__} occurred when plotting weather parametres. \n"
-                             f"No values were plotted on a graph at the mentioned time")
-            self.errors.append(error_message)
-
-    def get_room_temp(self, button):
-        """Gets and updates room temperature reading"""
-        try:
-            reading = BME280.get_temperature()
-            temperature = str(round(reading, 2))
-            button.setText(temperature + chr(176) + "C")
-        except OSError:
-            button.setText("no sensor found")
-        except NameError:
-            button.setText("library error")
-
-    def get_outside_temp(self, button):
-        """Gets and updates outside temperature reading"""
-        try:
-            sensor = W1ThermSensor()
-            reading = sensor.get_temperature()
-            temperature = str(round(reading, 2))
-            button.setText(temperature + chr(176) + "C")
-        except NameError:
-            button.setText("library error")
-        except SensorNotReadyError:
-            button.setText("sensor not ready")
-        except NoSensorFoundError:
-            button.setText("no sensor found")
-        except Exception as e:
-            button.setText(type(e).__name__)
-
-    def get_humidity(self, button):
-        """Gets and updates humidity reading"""
-        try:
-            reading = BME280.get_humidity()
-            humidity = str(round(reading, 2))
-            button.setText(f"{humidity}%")
-        except OSError:
-            button.setText("no sensor found")
-        except NameError:
-            button.setText("library error")
-        except Exception as e:
-            button.setText(type(e).__name__)
-
-    def get_atm_pressure(self, button):
-        """Gets and updates pressure reading"""
-        try:
-            reading = BME280.get_pressure()
-            pressure = str(round(reading, 2))
-            button.setText(f"{pressure} hPa")
-        except OSError:
-            button.setText("no sensor found")
-        except NameError:
-            button.setText("library error")
-        except Exception as e:
-            button.setText(type(e).__name__)
-
-    def get_rain_info(self, button):
-        """
-        Checks state on GPIO pin to determine weather or nor rain has been detected
-        Updates rain info in main window
-        """
-        try:
-            if GPIO.input(8) == GPIO.LOW:
-                button.setText('Rain detected')
-            else:
-                button.setText('No rain')
-        except NameError:
-            button.setText("library error")
-        except Exception as e:
-            button.setText(type(e).__name__)
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+import sqlite3
+import numpy as np
+from history import HistoryStore, CHANNELS
+from storage import HistoryDatabase, DATABASE_PATH
+from rollup import RollupEngine
+from acquisition import AcquisitionWorker, SENSOR_TIMEOUT
+from drivers import create_drivers
+from scheduler import Scheduler
+from sampling import AdaptiveSampler, CounterIntervals
+from error_journal import ErrorJournal
+from metrics import shared_metrics, METRICS_PATH
+
+# Samples kept in memory, 20 days at the old fixed 3-minute rate; older ones are read from the database
+HISTORY_CAPACITY = 9600
+# Snapshots older than this are not logged, the next one is used instead (seconds)
+SNAPSHOT_MAX_AGE = 10
+
+
+class BackendBase(QObject):
+    """Tile formatting and clock helpers shared by the in-process Backend and the RemoteBackend of the daemon."""
+    snapshot_taken = pyqtSignal(object)
+    # False while the readings come from a station daemon that cannot be reached
+    available = True
+
+    @staticmethod
+    def describe_error(error):
+        """Turns a sensor exception into the short text shown on a tile."""
+        if isinstance(error, TimeoutError):
+            return "stale"
+        if isinstance(error, ImportError):
+            return "library error"
+        if isinstance(error, ConnectionError):
+            return "daemon unavailable"
+        if isinstance(error, OSError):
+            return "no sensor found"
+        name = type(error).__name__
+        return {"SensorNotReadyError": "sensor not ready",
+                "NoSensorFoundError": "no sensor found"}.get(name, name)
+
+    def format_reading(self, snapshot, channel):
+        """Returns the tile text for one channel of a snapshot."""
+        if channel in snapshot.errors:
+            return self.describe_error(snapshot.errors[channel])
+        value = snapshot.values[channel]
+        if channel in ("room_temp", "outside_temp"):
+            return str(round(value, 2)) + chr(176) + "C"
+        if channel == "humidity":
+            return f"{round(value, 2)}%"
+        if channel == "pressure":
+            return f"{round(value, 2)} hPa"
+        return "Rain detected" if value else "No rain"
+
+    def daemon_diagnostics(self):
+        """Metrics and job statistics of the station daemon, None when the sensors are read in this process."""
+        return None
+
+    def newest_time(self):
+        """Timestamp of the newest sample in the history ring, 0 when it is empty."""
+        latest = self.history.latest()
+        return latest[0] if latest is not None else 0
 
     def update_date_and_time(self, time_label, date_label):
         """Updates the displayed date and time labels."""
@@ -187,3 +76,154 @@ class Backend:
         date = real_time.strftime("%d-%m-%y")
         time_label.setText(hour)
         date_label.setText(date)
+
+
+class Backend(BackendBase):
+    acquire_requested = pyqtSignal()
+
+    def __init__(self, capacity=HISTORY_CAPACITY, database_path=DATABASE_PATH, drivers=None, scheduler=None,
+                 sampler=None, history=None):
+        super().__init__()
+        self.history = history if history is not None else HistoryStore(CHANNELS, capacity)
+        self.rollups = RollupEngine(CHANNELS)
+
+        # Sensors are read faster while a channel is changing and logged only when it moved or went stale
+        self.sampler = sampler or AdaptiveSampler()
+        self.scheduler = scheduler or Scheduler()
+        self.scheduler.add("logging", self.update_data, self.sampler.interval, priority=10)
+        self.scheduler.add("metrics export", self.export_metrics, 60)
+        self.errors = ErrorJournal()
+        self.metrics = shared_metrics()
+        self.counter = 0
+        self.counter_intervals = CounterIntervals()
+        self.database = None
+        self.snapshot = None
+        self.acquiring = False
+
+        self.acquisition_worker = AcquisitionWorker(drivers if drivers is not None else create_drivers())
+        self.acquisition_thread = QThread()
+        self.acquisition_worker.moveToThread(self.acquisition_thread)
+        self.acquire_requested.connect(self.acquisition_worker.acquire)
+        self.acquisition_worker.snapshot_ready.connect(self.receive_snapshot)
+        self.acquisition_thread.start()
+
+        self.open_database(database_path)
+        self.update_data()
+
+    def open_database(self, database_path):
+        """Opens the on-disk history and refills the in-memory buffers and rollups from it."""
+        try:
+            self.database = HistoryDatabase(database_path, CHANNELS)
+            timestamps, columns = self.database.recent(self.history.capacity)
+            self.rollups = RollupEngine(CHANNELS, database_path=database_path)
+            self.rollups.load(self.database.read_range)
+        except sqlite3.Error as e:
+            self.database = None
+            self.rollups = RollupEngine(CHANNELS)
+            self.errors.record("database", e, "opening the history database",
+                               "Readings will not be kept after a restart")
+            return
+        self.history.extend(timestamps, columns)
+        self.counter = len(timestamps)
+
+    def close(self):
+        """Stops the acquisition thread and commits any buffered samples to disk."""
+        self.acquisition_worker.shutdown()
+        self.acquisition_thread.quit()
+        self.acquisition_thread.wait(int(SENSOR_TIMEOUT * 1000))
+        self.rollups.close()
+        self.errors.close()
+        if self.database is not None:
+            self.database.close()
+            self.database = None
+
+    def read_range(self, start, end, limit=None):
+        """
+        Returns raw samples between start and end, or the oldest `limit` of them, from memory when the
+        ring buffer reaches back far enough.
+        """
+        times = self.history.timestamps()
+        if self.database is not None and len(self.history) == self.history.capacity and times[0] > start:
+            return self.database.read_range(start, end, limit)
+        first = np.searchsorted(times, start, side="left")
+        last = np.searchsorted(times, end, side="right")
+        if limit is not None:
+            last = min(last, first + limit)
+        return times[first:last], {name: self.history.values(name)[first:last] for name in CHANNELS}
+
+    def history_bounds(self):
+        """Returns the (oldest, newest) logged timestamps, or None before the first sample."""
+        latest = self.history.latest()
+        if latest is None:
+            return None
+        oldest = int(self.history.timestamps()[0])
+        if self.database is not None:
+            oldest = min(oldest, self.database.first_timestamp() or oldest)
+        return oldest, latest[0]
+
+    def series(self, channel, start, end, points):
+        """
+        Returns times with the mean, min and max of `channel` between start and end,
+        taken from the coarsest rollup tier that still gives at least `points` points.
+        """
+        tier = self.rollups.tier_for(start, end, points)
+        if tier is not None:
+            return self.rollups.series(tier, channel, start, end)
+        times, columns = self.read_range(start, end)
+        values = columns[channel]
+        return times, values, values, values
+
+    def request_snapshot(self):
+        """Asks the acquisition thread for a new snapshot unless one is already being read."""
+        if not self.acquiring:
+            self.acquiring = True
+            self.acquire_requested.emit()
+
+    def receive_snapshot(self, snapshot):
+        """Stores a snapshot coming back from the acquisition thread, publishes it and logs it when due."""
+        self.acquiring = False
+        self.snapshot = snapshot
+        self.snapshot_taken.emit(snapshot)
+        self.sampling(snapshot)
+
+    def update_data(self):
+        """Reads the sensors unless a fresh snapshot, already offered to the sampler, came in meanwhile."""
+        snapshot = self.snapshot
+        if snapshot is None or datetime.now().timestamp() - snapshot.timestamp > SNAPSHOT_MAX_AGE:
+            self.request_snapshot()
+
+    def sampling(self, snapshot):
+        """Logs the snapshot when the sampler finds it due and moves the logging job to the sampler's rate."""
+        if self.sampler.due(snapshot.timestamp, snapshot.values):
+            self.log_snapshot(snapshot)
+            self.sampler.logged(snapshot.timestamp, snapshot.values)
+        else:
+            self.metrics.increment("meteo_samples_skipped_total")
+        self.scheduler.set_period("logging", self.sampler.interval)
+
+    def log_snapshot(self, snapshot):
+        """Adds a snapshot to the hourly log, the rollups and the database."""
+        for channel, e in snapshot.errors.items():
+            self.errors.record(channel, e, f"reading {channel}",
+                               f"No {channel} value was plotted on a graph at the mentioned time")
+        if not snapshot.values:
+            return
+        values = self.counter_intervals.values(snapshot.timestamp, snapshot.values)
+        try:
+            with self.metrics.timer("meteo_log_snapshot_seconds", failures="meteo_log_snapshot_failures_total"):
+                self.history.append(snapshot.timestamp, values)
+                self.rollups.add(snapshot.timestamp, values)
+                if self.database is not None:
+                    self.database.append(snapshot.timestamp, values)
+            self.counter += 1
+            self.metrics.increment("meteo_samples_logged_total")
+        except Exception as e:
+            self.errors.record("history", e, "plotting weather parametres",
+                               "No values were plotted on a graph at the mentioned time")
+
+    def export_metrics(self, path=METRICS_PATH):
+        """Writes the metrics for the Prometheus textfile collector."""
+        try:
+            self.metrics.export(path)
+        except OSError as e:
+            self.errors.record("metrics", e, "writing the metrics file", f"{path} was not updated")
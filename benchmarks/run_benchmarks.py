@@ -0,0 +1,321 @@
+"""
+Offscreen benchmarks of the meteo station.
+
+    python benchmarks/run_benchmarks.py [--quick] [--only NAME ...] [--output FILE] [--baseline FILE]
+
+Qt runs on the offscreen platform, the sensors are simulated and OpenWeatherMap is replaced by a
+local stub server, so runs are repeatable on any machine. Results are written as JSON; with
+--baseline every timing is compared with an earlier run and slowdowns above 10% are flagged.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path[:0] = [REPOSITORY_DIR, BENCHMARKS_DIR]
+
+import numpy as np
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+
+from acquisition import SensorSnapshot
+from backend import Backend
+from drivers import SimulatedWeather, create_drivers
+from stub_owm import StubHandler, start_stub_server
+from theme import theme_for
+
+PLOT_SIZES = (20, 10_000, 1_000_000)
+QUICK_PLOT_SIZES = (20, 10_000)
+SAMPLE_PERIOD = 180
+WEEK = 7 * 86400
+
+
+def timings(samples):
+    """Summary of a list of durations in seconds, in milliseconds."""
+    return {"runs": len(samples),
+            "min_ms": round(1000 * min(samples), 3),
+            "median_ms": round(1000 * statistics.median(samples), 3),
+            "max_ms": round(1000 * max(samples), 3)}
+
+
+def measure(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - started)
+    return timings(samples)
+
+
+def rss_kb():
+    """Peak resident set size of the process (KiB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def wait_for(signal, action, accept, timeout=10.0):
+    """Runs `action` and returns the seconds until `signal` carries arguments accepted by `accept`."""
+    loop = QEventLoop()
+    finished = []
+
+    def received(*args):
+        if not finished and accept(*args):
+            finished.append(time.perf_counter())
+            loop.quit()
+
+    signal.connect(received)
+    started = time.perf_counter()
+    action()
+    if not finished:
+        QTimer.singleShot(int(timeout * 1000), loop.quit)
+        loop.exec_()
+    signal.disconnect(received)
+    if not finished:
+        raise TimeoutError(f"no answer within {timeout} s")
+    return finished[0] - started
+
+
+def synthetic_columns(times):
+    """Smooth values for every channel, fast enough to generate a million samples."""
+    return {"room_temp": 21.5 + 0.8 * np.sin(times / 7200),
+            "outside_temp": 8.0 + 6.0 * np.sin(times / 13751),
+            "humidity": 45.0 + 8.0 * np.cos(times / 13751),
+            "pressure": 1013.0 + 9.0 * np.sin(times / 59000),
+            "rain": (np.sin(times / 5000) > 0.9).astype(float)}
+
+
+def bench_update_data(workdir, quick):
+    """Samples logged per second from incoming snapshots, sampling decision, SQLite batching and rollups included."""
+    count = 500 if quick else 5000
+    backend = Backend(database_path=os.path.join(workdir, "update_data.db"), drivers=create_drivers(True))
+    weather = SimulatedWeather()
+    # Snapshots a full back-off interval apart, so the sampler logs every one of them
+    period = max(highest for _, highest, _ in backend.sampler.limits.values())
+    start = int(time.time()) - count * period
+    snapshots = [SensorSnapshot(start + i * period, weather.sample(start + i * period), {})
+                 for i in range(count)]
+    started = time.perf_counter()
+    for snapshot in snapshots:
+        backend.receive_snapshot(snapshot)
+    elapsed = time.perf_counter() - started
+    backend.close()
+    return {"samples": count,
+            "samples_per_second": round(count / elapsed, 1),
+            "mean_us": round(1e6 * elapsed / count, 2)}
+
+
+def bench_plot(workdir, quick):
+    """PlotWindow.updating_plot latency, cold and incremental, and the time to paint the window."""
+    from plot_window import PlotWindow
+
+    results = {}
+    for size in QUICK_PLOT_SIZES if quick else PLOT_SIZES:
+        backend = Backend(capacity=size + 64, database_path=os.path.join(workdir, f"plot_{size}.db"),
+                          drivers=create_drivers(True))
+        # Every point falls inside the visible hour, so all of them are drawn
+        end = time.time() - 1
+        times = np.linspace(end - 3500, end, size)
+        backend.history.extend(times, synthetic_columns(times))
+        window = PlotWindow("Temperature", backend, theme_for(True))
+        window.resize(1024, 600)
+        window.show()
+        QApplication.processEvents()
+        repeat = 1 if size >= 1_000_000 else 5
+
+        def cold():
+            window.decimation.clear()
+            window.updating_plot()
+
+        def incremental():
+            now = time.time()
+            backend.history.append(now, {channel: values[-1] for channel, values in
+                                         synthetic_columns(np.array([now])).items()})
+            window.updating_plot()
+
+        results[str(size)] = {"cold": measure(cold, repeat),
+                              "incremental": measure(incremental, repeat),
+                              "paint": measure(window.grab, repeat)}
+        window.close()
+        backend.scheduler.remove(window.clock_job)
+        backend.scheduler.remove(window.refresh_job)
+        backend.close()
+    return results
+
+
+def bench_screens(workdir, quick):
+    """Time to build and paint every screen on its first open, and to show it again afterwards."""
+    import main
+
+    server = start_stub_server()
+    app = QApplication.instance()
+    main.set_theme(app, True)
+    started = time.perf_counter()
+    window = main.MainWindow(simulated=True)
+    window.show()
+    app.processEvents()
+    results = {"main window": round(1000 * (time.perf_counter() - started), 3)}
+    for name in list(window.windows.factories):
+        opens = {}
+        for attempt in ("first_open_ms", "reopen_ms"):
+            started = time.perf_counter()
+            screen = window.windows.show(name)
+            app.processEvents()
+            opens[attempt] = round(1000 * (time.perf_counter() - started), 3)
+            screen.close()
+            app.processEvents()
+        results[name] = opens
+    window.close()
+    window.backend.close()
+    server.shutdown()
+    return results
+
+
+def bench_memory(workdir, quick):
+    """Python heap and peak RSS after every simulated week of 3-minute samples."""
+    weeks = 2 if quick else 6
+    backend = Backend(database_path=os.path.join(workdir, "memory.db"), drivers=create_drivers(True))
+    weather = SimulatedWeather()
+    start = time.time() - weeks * WEEK
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    results = []
+    per_week = WEEK // SAMPLE_PERIOD
+    for week in range(weeks):
+        for i in range(per_week):
+            timestamp = start + (week * per_week + i) * SAMPLE_PERIOD
+            backend.log_snapshot(SensorSnapshot(timestamp, weather.sample(timestamp), {}))
+        results.append({"week": week + 1,
+                        "samples": (week + 1) * per_week,
+                        "heap_growth_kb": round((tracemalloc.get_traced_memory()[0] - baseline) / 1024, 1),
+                        "peak_rss_kb": rss_kb()})
+    tracemalloc.stop()
+    backend.close()
+    return results
+
+
+def bench_world_weather(workdir, quick):
+    """Time from pressing "Check Weather!" to filled labels, against a stub server answering at once."""
+    from weather_client import WeatherClient
+    from world_weather import WorldWeather
+    from cities import POLAND_CITIES
+
+    server = start_stub_server()
+    client = WeatherClient(keys_file=os.path.join(workdir, "missing.env"), cache_path=None)
+    screen = WorldWeather(client=client)
+    cities = POLAND_CITIES[:5 if quick else 20]
+
+    def ask(city):
+        def action():
+            screen.city_list.setCurrentText(city)
+            screen.get_weather()
+        return wait_for(client.weather_ready, action, lambda name, data: name == city)
+
+    cold = [ask(city) for city in cities]
+    cached = [ask(city) for city in cities]
+    icon = wait_for(client.icon_ready, lambda: client.deliver_icon({"weather": [{"icon": "01d"}]}),
+                    lambda code, content: code == "01d")
+    screen.close()
+    client.close()
+    server.shutdown()
+    return {"cold": timings(cold), "cached": timings(cached), "cached_icon_ms": round(1000 * icon, 3),
+            "stub_requests": dict(StubHandler.requests)}
+
+
+BENCHMARKS = {"update_data": bench_update_data,
+              "plot": bench_plot,
+              "screens": bench_screens,
+              "memory": bench_memory,
+              "world_weather": bench_world_weather}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPOSITORY_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(results, prefix=""):
+    """Yields (path, value) for every number in nested results."""
+    if isinstance(results, dict):
+        for key, value in results.items():
+            yield from flatten(value, f"{prefix}/{key}" if prefix else str(key))
+    elif isinstance(results, list):
+        for index, value in enumerate(results):
+            yield from flatten(value, f"{prefix}[{index}]")
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        yield prefix, results
+
+
+def compare(current, baseline):
+    """Prints every timing that changed by more than 10%; higher throughput is better, other numbers lower."""
+    old = dict(flatten(baseline["results"]))
+    for path, value in flatten(current["results"]):
+        previous = old.get(path)
+        # Medians are compared, single extremes are too noisy to flag
+        if not previous or path.endswith(("runs", "samples", "week", "min_ms", "max_ms")):
+            continue
+        change = (value - previous) / previous
+        if "per_second" in path:
+            change = -change
+        if abs(change) > 0.10:
+            verdict = "SLOWER" if change > 0 else "faster"
+            print(f"{verdict:>7} {100 * change:+7.1f}%  {path}: {previous} -> {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, skips the 1M point plot")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/<time>.json)")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv[:1])
+    report = {"started": datetime.now().isoformat(timespec="seconds"),
+              "commit": git_commit(),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "quick": args.quick,
+              "results": {}}
+    previous_dir = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="meteo-bench-") as workdir:
+        # Relative paths (icons, databases, caches, logs) resolve inside the scratch directory
+        os.symlink(os.path.join(REPOSITORY_DIR, "icons"), os.path.join(workdir, "icons"))
+        os.chdir(workdir)
+        try:
+            for name in args.only or BENCHMARKS:
+                print(f"running {name}...", file=sys.stderr)
+                report["results"][name] = BENCHMARKS[name](workdir, args.quick)
+                app.processEvents()
+        finally:
+            os.chdir(previous_dir)
+
+    if args.output:
+        output = os.path.abspath(args.output)
+    else:
+        output = os.path.join(BENCHMARKS_DIR, "results", datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    print(json.dumps(report["results"], indent=2))
+    print(f"results written to {output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# 1x1 transparent PNG served for every weather icon
+ICON_PNG = (b"\x89PNG\r\n\x1a\n"
+            + png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 6, 0, 0, 0))
+            + png_chunk(b"IDAT", zlib.compress(b"\x00\x00\x00\x00\x00"))
+            + png_chunk(b"IEND", b""))
+
+
+def city_weather(name, city_id):
+    """Answer in the shape of the OpenWeatherMap current weather endpoint."""
+    return {"cod": 200, "id": city_id, "name": name,
+            "weather": [{"icon": "01d", "description": "clear sky"}],
+            "main": {"temp": 280.15, "humidity": 50, "pressure": 1010},
+            "wind": {"speed": 3.2}}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Serves /data/2.5/weather, /data/2.5/group and /img/wn/ after `delay` seconds."""
+    delay = 0.0
+    requests = {"weather": 0, "group": 0, "icon": 0}
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.startswith("/img/wn/"):
+            self.requests["icon"] += 1
+            self.send_body(ICON_PNG, "image/png")
+        elif url.path == "/data/2.5/group":
+            self.requests["group"] += 1
+            ids = query["id"][0].split(",")
+            answers = [city_weather(f"city {city_id}", int(city_id)) for city_id in ids]
+            self.send_body(json.dumps({"cnt": len(answers), "list": answers}).encode(), "application/json")
+        elif url.path == "/data/2.5/weather":
+            self.requests["weather"] += 1
+            name = query["q"][0]
+            self.send_body(json.dumps(city_weather(name, zlib.crc32(name.encode()) % 1000000)).encode(),
+                           "application/json")
+        else:
+            self.send_error(404)
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub_server(delay=0.0):
+    """Starts the stub on a free local port and points weather_client at it; returns the server."""
+    import weather_client
+
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, name="stub-owm", daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    weather_client.API_URL = base + "/data/2.5/weather"
+    weather_client.GROUP_URL = base + "/data/2.5/group"
+    weather_client.ICON_URL = base + "/img/wn/{icon}@2x.png"
+    return server
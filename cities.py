@@ -0,0 +1,23 @@
+# Some Well-Known Capitals Around the World
+WORLD_CAPITALS = [
+    "Abu Dhabi", "Amman", "Amsterdam", "Ankara", "Athens", "Baghdad", "Bangkok", "Beijing", "Belgrade",
+    "Berlin", "Bogota", "Brasilia", "Brussels", "Bucharest", "Budapest", "Buenos Aires", "Cairo",
+    "Canberra", "Caracas", "Copenhagen", "Doha", "Dublin", "Hanoi", "Helsinki", "Istanbul",
+    "Jakarta", "Kabul", "Kuala Lumpur", "Lisbon", "London", "Madrid", "Manila", "Mexico City",
+    "Moscow", "New Delhi", "Oslo", "Ottawa", "Paris", "Prague", "Reykjavik", "Riyadh", "Rome",
+    "Santiago", "Seoul", "Singapore", "Sofia", "Stockholm", "Tehran", "Tokyo", "Vienna", "Warsaw",
+    "Washington", "Zagreb"
+]
+
+
+POLAND_CITIES = [
+    "Warszawa", "Kraków", "Łódź", "Wrocław", "Poznań", "Gdańsk", "Szczecin",
+    "Bydgoszcz", "Lublin", "Katowice", "Białystok", "Gdynia", "Częstochowa",
+    "Radom", "Sosnowiec", "Toruń", "Kielce", "Gliwice", "Zabrze", "Olsztyn",
+    "Rzeszów", "Zielona Góra", "Bytom", "Nowy Sącz", "Wałbrzych", "Opole",
+    "Płock", "Elbląg", "Gorzów Wielkopolski", "Dąbrowa Górnicza", "Tarnów",
+    "Kalisz", "Legnica", "Świdnica", "Mielec", "Przemyśl", "Stalowa Wola",
+    "Lubin", "Tychy", "Chorzów", "Ruda Śląska", "Siedlce", "Włocławek",
+    "Ciechanów", "Kołobrzeg", "Lubliniec", "Zamość", "Żory", "Piotrków Trybunalski",
+    "Kędzierzyn-Koźle", "Suwalki", "Świnoujście", "Krosno", "Kutno", "Kielce", "Głogów"
+]
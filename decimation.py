@@ -0,0 +1,114 @@
+import math
+from collections import OrderedDict
+import numpy as np
+
+
+def decimate(times, means, minimums, maximums, width):
+    """
+    Reduces samples to the minimum and maximum of every bin of `width` seconds, so peaks survive
+    however far the plot is zoomed out; a bin holding a single sample keeps it as it is.
+    Returns (bins, x, y, decimated), with the bin index of every returned point.
+    """
+    # Copied, the samples can be views of a history ring that later appends overwrite
+    times = np.array(times, dtype=float)
+    means = np.array(means, dtype=float)
+    bins = np.floor_divide(times, width).astype(np.int64)
+    if len(times) < 2 or np.all(np.diff(bins) > 0):
+        return bins, times, means, False
+    starts = np.flatnonzero(np.r_[True, np.diff(bins) > 0])
+    single = np.diff(np.r_[starts, len(times)]) == 1
+    # fmin/fmax skip NaN gaps left by missing readings
+    lows = np.fmin.reduceat(np.asarray(minimums, dtype=float), starts)
+    highs = np.fmax.reduceat(np.asarray(maximums, dtype=float), starts)
+    left = bins[starts] * float(width)
+    x = np.column_stack((np.where(single, times[starts], left + 0.25 * width), left + 0.75 * width)).ravel()
+    y = np.column_stack((np.where(single, means[starts], lows), highs)).ravel()
+    point_bins = np.repeat(bins[starts], 2)
+    keep = np.ones(len(x), dtype=bool)
+    keep[1::2] = ~single
+    return point_bins[keep], x[keep], y[keep], True
+
+
+class DecimatedLevel:
+    """
+    Decimated points of one zoom level between `start` and `end`, complete up to `newest`.
+    `last` is the time of the last point loaded, e.g. the start of an open rollup bucket, or None.
+    """
+
+    def __init__(self, width, start, end, newest, last, bins, x, y, decimated):
+        self.width = width
+        self.start = start
+        self.end = end
+        self.newest = newest
+        self.last = last
+        self.bins = bins
+        self.x = x
+        self.y = y
+        self.decimated = decimated
+
+
+class DecimationCache:
+    """
+    Level-of-detail cache of one plotted channel. Zoom level n groups samples into bins 2**n seconds
+    wide, on a grid fixed in time, and is computed for the viewed range plus one screen on either
+    side. Panning within that range only slices cached arrays, and new samples only recompute
+    the bins from the previous newest sample on.
+    `load(start, end, points)` returns (times, means, minimums, maximums) with about `points` buckets.
+    """
+
+    def __init__(self, load, max_levels=8):
+        self.load = load
+        self.max_levels = max_levels
+        self.levels = OrderedDict()
+
+    def clear(self):
+        self.levels.clear()
+
+    @staticmethod
+    def level_for(start, end, columns):
+        """Finest power-of-two bin width giving at most one bin per pixel column."""
+        return max(0, math.ceil(math.log2(max(end - start, 1.0) / max(columns, 1))))
+
+    def build(self, width, start, end, newest):
+        times, means, minimums, maximums = self.load(start, end, (end - start) / width)
+        last = float(times[-1]) if len(times) else None
+        return DecimatedLevel(width, start, end, newest, last, *decimate(times, means, minimums, maximums, width))
+
+    def refresh_tail(self, entry, newest):
+        """
+        Recomputes the bins from the one holding the previous newest sample up to the end of the level.
+        The last point loaded is always read again: a rollup bucket is stamped with its start, which can
+        lie before the previous newest sample, and its aggregates change until it closes.
+        """
+        reload_from = entry.newest if entry.last is None else min(entry.newest, entry.last)
+        first_bin = int(reload_from // entry.width)
+        tail = self.build(entry.width, first_bin * entry.width, entry.end, newest)
+        keep = np.searchsorted(entry.bins, first_bin, side="left")
+        entry.bins = np.concatenate((entry.bins[:keep], tail.bins))
+        entry.x = np.concatenate((entry.x[:keep], tail.x))
+        entry.y = np.concatenate((entry.y[:keep], tail.y))
+        entry.decimated = entry.decimated or tail.decimated
+        entry.newest = newest
+        if tail.last is not None:
+            entry.last = tail.last
+
+    def curve(self, start, end, columns, newest):
+        """Returns (x, y, decimated) covering start..end at about one bin per pixel column."""
+        level = self.level_for(start, end, columns)
+        entry = self.levels.get(level)
+        if entry is None or start < entry.start or end > entry.end:
+            span = end - start
+            entry = self.levels[level] = self.build(2 ** level, start - span, end + span, newest)
+        elif newest > entry.newest:
+            if entry.newest < entry.end:
+                self.refresh_tail(entry, newest)
+            else:
+                entry.newest = newest
+        self.levels.move_to_end(level)
+        while len(self.levels) > self.max_levels:
+            self.levels.popitem(last=False)
+
+        # One point either side keeps the line running to the edges of the view
+        first = max(0, np.searchsorted(entry.x, start, side="left") - 1)
+        last = np.searchsorted(entry.x, end, side="right") + 1
+        return entry.x[first:last], entry.y[first:last], entry.decimated
@@ -0,0 +1,84 @@
+import time
+from metrics import shared_metrics
+
+# Waits before probing a missing device again; the last one repeats (seconds)
+PROBE_BACKOFF = (10, 30, 60, 300, 900)
+# Consecutive failed reads after which an open device is treated as gone and probed again
+MAX_READ_FAILURES = 3
+
+
+class Device:
+    """Discovery state of one driver."""
+    __slots__ = ("driver", "is_open", "probes", "read_failures", "next_probe", "error")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.is_open = False
+        self.probes = 0
+        self.read_failures = 0
+        self.next_probe = 0.0
+        self.error = None
+
+
+class DeviceRegistry:
+    """
+    Opens every sensor once and keeps its handle for later reads.
+    A device that could not be found is probed again on the `backoff` schedule; until then its reads
+    fail at once with the error of the last probe, so a missing sensor costs nothing per refresh.
+    An open device that fails `max_read_failures` reads in a row is closed and probed again.
+    Each device is only used by one thread at a time, the acquisition worker never reads a sensor twice at once.
+    """
+
+    def __init__(self, drivers, backoff=PROBE_BACKOFF, max_read_failures=MAX_READ_FAILURES, metrics=None,
+                 clock=time.monotonic):
+        self.devices = {driver.name: Device(driver) for driver in drivers}
+        self.backoff = backoff
+        self.max_read_failures = max_read_failures
+        self.metrics = metrics or shared_metrics()
+        self.clock = clock
+
+    def probe(self, name):
+        """Opens a device, scheduling the next probe when it is not there."""
+        device = self.devices[name]
+        try:
+            device.driver.open()
+        except Exception as e:
+            device.error = e
+            device.next_probe = self.clock() + self.backoff[min(device.probes, len(self.backoff) - 1)]
+            device.probes += 1
+            self.metrics.increment("meteo_sensor_probes_total", sensor=name, result="missing")
+            raise
+        device.is_open = True
+        device.probes = 0
+        device.read_failures = 0
+        device.error = None
+        self.metrics.increment("meteo_sensor_probes_total", sensor=name, result="found")
+
+    def read(self, name):
+        """Reads a device, opening it first when it is due for a probe."""
+        device = self.devices[name]
+        if not device.is_open:
+            if self.clock() < device.next_probe:
+                raise device.error.with_traceback(None)
+            self.probe(name)
+        try:
+            values = device.driver.read()
+        except Exception as e:
+            device.read_failures += 1
+            if device.read_failures >= self.max_read_failures:
+                self.release(device)
+                device.error = e
+                device.next_probe = self.clock() + self.backoff[0]
+            raise
+        device.read_failures = 0
+        return values
+
+    def release(self, device):
+        device.driver.close()
+        device.is_open = False
+
+    def close(self):
+        """Releases every open device."""
+        for device in self.devices.values():
+            if device.is_open:
+                self.release(device)
@@ -0,0 +1,111 @@
+from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+                             QHBoxLayout, QVBoxLayout, QHeaderView, QAbstractItemView)
+from PyQt5.QtCore import Qt
+
+HISTOGRAM_COLUMNS = ["Operation", "Count", "Mean ms", "p95 ms", "Max ms"]
+COUNTER_COLUMNS = ["Counter", "Value"]
+
+
+class DiagnosticsWindow(QWidget):
+    def __init__(self, backend):
+        """Shows the latency histograms and counters of the hot paths, refreshed while the window is open."""
+        super().__init__()
+        self.backend = backend
+        self.refresh_job = "diagnostics refresh"
+
+        self.title = QLabel("Diagnostics")
+        self.timings_table = QTableWidget(0, len(HISTOGRAM_COLUMNS))
+        self.timings_table.setHorizontalHeaderLabels(HISTOGRAM_COLUMNS)
+        self.counters_table = QTableWidget(0, len(COUNTER_COLUMNS))
+        self.counters_table.setHorizontalHeaderLabels(COUNTER_COLUMNS)
+        self.tables = [self.timings_table, self.counters_table]
+
+        self.back_button = QPushButton("Main menu")
+        self.back_button.clicked.connect(self.close)
+
+        self.backend.scheduler.add(self.refresh_job, self.updating_tables, 5, enabled=False)
+        self.layout()
+        self.styling()
+
+    def showEvent(self, event):
+        self.updating_tables()
+        self.backend.scheduler.resume(self.refresh_job)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.backend.scheduler.pause(self.refresh_job)
+        super().hideEvent(event)
+
+    @staticmethod
+    def describe(key):
+        """Turns a (name, labels) metric key into a readable row title."""
+        name, labels = key
+        name = name.removeprefix("meteo_")
+        if labels:
+            name += " (" + ", ".join(str(value) for _, value in labels) + ")"
+        return name
+
+    @staticmethod
+    def filling_table(table, rows):
+        table.setRowCount(len(rows))
+        for row, cells in enumerate(rows):
+            for column, cell in enumerate(cells):
+                item = QTableWidgetItem(cell)
+                if column:
+                    item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                table.setItem(row, column, item)
+
+    def rows(self, counters, histograms, jobs, prefix=""):
+        """Returns the timing and counter rows of one process, titles starting with `prefix`."""
+        timings = [(prefix + self.describe(key), str(count), f"{1000 * mean:.1f}", f"{1000 * p95:.1f}",
+                    f"{1000 * peak:.1f}")
+                   for key, (count, mean, p95, peak) in sorted(histograms.items())]
+        for job in jobs:
+            timings.append((f"{prefix}job {job['name']}", str(job["runs"]), f"{job['mean_ms']:.1f}", "",
+                            f"{job['max_ms']:.1f}"))
+        return timings, [(prefix + self.describe(key), str(value)) for key, value in sorted(counters.items())]
+
+    def updating_tables(self):
+        """
+        Refreshes both tables from the metrics registry and the scheduler statistics, followed by
+        those of the station daemon when the kiosk is attached to one.
+        """
+        timings, counters = self.rows(*self.backend.metrics.snapshot(), self.backend.scheduler.summary())
+        daemon = self.backend.daemon_diagnostics()
+        if daemon is not None:
+            daemon_timings, daemon_counters = self.rows(*daemon, prefix="daemon ")
+            timings += daemon_timings
+            counters += daemon_counters
+        self.filling_table(self.timings_table, timings)
+        self.filling_table(self.counters_table, counters)
+
+    def styling(self):
+        """Sets styling"""
+        self.title.setStyleSheet("font-size: 35px;")
+        self.title.setAlignment(Qt.AlignCenter)
+        self.back_button.setStyleSheet("font-size: 25px;")
+        for table in self.tables:
+            table.setStyleSheet("font-size: 18px; font-weight: normal;")
+            table.verticalHeader().setVisible(False)
+            table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+            table.setSelectionMode(QAbstractItemView.NoSelection)
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+            table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+
+    def layout(self):
+        """Manages layout"""
+        tables_layout = QHBoxLayout()
+        tables_layout.addWidget(self.timings_table, 3)
+        tables_layout.addWidget(self.counters_table, 2)
+
+        bottom_layout = QHBoxLayout()
+        bottom_layout.addStretch(1)
+        bottom_layout.addWidget(self.back_button)
+        bottom_layout.addStretch(1)
+
+        main_layout = QVBoxLayout()
+        main_layout.addWidget(self.title)
+        main_layout.addLayout(tables_layout)
+        main_layout.addLayout(bottom_layout)
+
+        self.setLayout(main_layout)
@@ -0,0 +1,215 @@
+import math
+import time
+from rain_gauge import RainEvents, MockGPIO, RAIN_DEBOUNCE
+
+
+class SensorDriver:
+    """
+    Base class of every sensor driver.
+    `open()` finds and configures the device once and raises when it is absent; `read()` then returns
+    {channel: value} for the driver's channels from the open handle and raises when the sensor cannot be read.
+    Hardware libraries are imported on open, so a missing library surfaces as a probe error.
+    """
+    name = "sensor"
+    channels = ()
+
+    def open(self):
+        """Finds the device and applies its settings."""
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        """Releases the hardware held by the driver."""
+
+
+class BME280Driver(SensorDriver):
+    """
+    Room temperature, pressure and humidity from a BME280 on the I2C bus.
+    The sensor runs in forced mode with 1x oversampling, the datasheet setting for weather
+    monitoring: it only measures when read and sleeps between samples.
+    """
+    name = "bme280"
+    channels = ("room_temp", "pressure", "humidity")
+
+    def __init__(self, bus=1, mode="forced", temperature_oversampling=1, pressure_oversampling=1,
+                 humidity_oversampling=1):
+        self.bus = bus
+        self.settings = {"mode": mode,
+                         "temperature_oversampling": temperature_oversampling,
+                         "pressure_oversampling": pressure_oversampling,
+                         "humidity_oversampling": humidity_oversampling}
+        self.sensor = None
+
+    def open(self):
+        from smbus import SMBus
+        from BME280 import BME280
+        sensor = BME280(i2c_dev=SMBus(self.bus))
+        sensor.setup(**self.settings)
+        self.sensor = sensor
+
+    def read(self):
+        # One burst read refreshes temperature, pressure and humidity together
+        self.sensor.update_sensor()
+        return {"room_temp": self.sensor.temperature,
+                "pressure": self.sensor.pressure,
+                "humidity": self.sensor.humidity}
+
+    def close(self):
+        self.sensor = None
+
+
+class DS18B20Driver(SensorDriver):
+    """Outside temperature from a DS18B20 on the 1-Wire bus."""
+    name = "ds18b20"
+    channels = ("outside_temp",)
+
+    def __init__(self):
+        self.sensor = None
+
+    def open(self):
+        from w1thermsensor import W1ThermSensor
+        # Scans the 1-Wire devices once; the handle then reads its sensor directly
+        self.sensor = W1ThermSensor()
+
+    def read(self):
+        return {"outside_temp": self.sensor.get_temperature()}
+
+    def close(self):
+        self.sensor = None
+
+
+class YL83Driver(SensorDriver):
+    """
+    Rain detection from the digital output of a YL-83 board, LOW while the plate is wet.
+    The pin is watched through GPIO edge events instead of being polled, so showers shorter than
+    the read interval are still counted. `read()` returns the debounced state with running totals
+    of wet/dry transitions and wet seconds since the driver started.
+    """
+    name = "yl83"
+    channels = ("rain", "rain_transitions", "rain_wet_seconds")
+
+    def __init__(self, pin=8, gpio=None, debounce=RAIN_DEBOUNCE, clock=time.monotonic):
+        self.pin = pin
+        self.gpio = gpio
+        self.debounce = debounce
+        self.clock = clock
+        self.events = None
+
+    def open(self):
+        """Sets the pin up and starts counting its edges."""
+        if self.gpio is None:
+            import RPi.GPIO as GPIO
+            self.gpio = GPIO
+        self.gpio.setmode(self.gpio.BOARD)
+        self.gpio.setwarnings(False)
+        self.gpio.setup(self.pin, self.gpio.IN)
+        self.events = RainEvents(self.wet(), self.debounce, self.clock)
+        # Bounces are filtered by RainEvents, a hardware bouncetime would drop the final edge of a burst
+        self.gpio.add_event_detect(self.pin, self.gpio.BOTH, callback=self.edge_detected)
+
+    def wet(self):
+        return self.gpio.input(self.pin) == self.gpio.LOW
+
+    def edge_detected(self, channel):
+        """Called on the GPIO interrupt thread after every edge on the pin."""
+        self.events.edge(self.wet())
+
+    def read(self):
+        wet, transitions, wet_seconds = self.events.totals()
+        return {"rain": 1 if wet else 0,
+                "rain_transitions": transitions,
+                "rain_wet_seconds": round(wet_seconds, 1)}
+
+    def close(self):
+        if self.events is not None:
+            self.gpio.remove_event_detect(self.pin)
+            self.gpio.cleanup(self.pin)
+            self.events = None
+
+
+class SimulatedWeather:
+    """
+    Deterministic weather model used instead of the hardware.
+    Every value is a pure function of the time and the seed: daily temperature and humidity
+    cycles, slow pressure systems, hashed noise and rain events at `rain_rate` showers per day.
+    `clock` supplies the time, so benchmarks can run it faster than real time.
+    """
+
+    def __init__(self, seed=0, rain_rate=1.0, clock=time.time):
+        self.seed = seed
+        self.rain_rate = rain_rate
+        self.clock = clock
+
+    def noise(self, timestamp, salt):
+        """Repeatable pseudo-random value in [-1, 1)."""
+        value = math.sin(timestamp * 12.9898 + (self.seed + salt) * 78.233) * 43758.5453
+        return 2.0 * (value - math.floor(value)) - 1.0
+
+    def raining(self, timestamp):
+        """Every hour may hold one shower starting and ending at hashed times."""
+        hour = math.floor(timestamp / 3600)
+        if (self.noise(hour, 10) + 1.0) / 2.0 >= self.rain_rate / 24.0:
+            return False
+        start = (self.noise(hour, 11) + 1.0) / 2.0 * 3600
+        length = 300 + (self.noise(hour, 12) + 1.0) / 2.0 * 2400
+        offset = timestamp - hour * 3600
+        return start <= offset < start + length
+
+    def sample(self, timestamp=None):
+        """Returns every channel at `timestamp` (the clock's current time by default)."""
+        t = self.clock() if timestamp is None else timestamp
+        local = t + time.localtime(t).tm_gmtoff
+        # Warmest around 15:00, coldest around 03:00
+        day_phase = 2.0 * math.pi * ((local / 86400.0) % 1.0 - 0.375)
+        rain = self.raining(t)
+
+        outside = 8.0 + 6.0 * math.sin(day_phase) + 0.15 * self.noise(t, 1) - (2.0 if rain else 0.0)
+        room = 21.5 + 0.8 * math.sin(day_phase - 0.6) + 0.05 * self.noise(t, 2)
+        humidity = 45.0 - 8.0 * math.sin(day_phase) + 0.5 * self.noise(t, 3) + (20.0 if rain else 0.0)
+        pressure = (1013.0 + 9.0 * math.sin(2.0 * math.pi * t / (4.3 * 86400) + self.seed)
+                    + 3.0 * math.sin(2.0 * math.pi * t / (1.7 * 86400)) + 0.05 * self.noise(t, 4)
+                    - (1.5 if rain else 0.0))
+        return {"room_temp": room,
+                "outside_temp": outside,
+                "humidity": min(100.0, max(0.0, humidity)),
+                "pressure": pressure,
+                "rain": 1 if rain else 0}
+
+
+class SimulatedDriver(SensorDriver):
+    """Serves the channels of one real driver from a SimulatedWeather model."""
+
+    def __init__(self, weather, name, channels):
+        self.weather = weather
+        self.name = name
+        self.channels = tuple(channels)
+
+    def read(self):
+        values = self.weather.sample()
+        return {channel: values[channel] for channel in self.channels}
+
+
+class SimulatedRainDriver(YL83Driver):
+    """YL-83 driver on a MockGPIO pin that follows the rain of a SimulatedWeather model."""
+
+    def __init__(self, weather):
+        super().__init__(gpio=MockGPIO(), debounce=0.0, clock=weather.clock)
+        self.weather = weather
+
+    def read(self):
+        raining = self.weather.raining(self.weather.clock())
+        self.gpio.set_input(self.pin, MockGPIO.LOW if raining else MockGPIO.HIGH)
+        return super().read()
+
+
+HARDWARE_DRIVERS = (BME280Driver, DS18B20Driver, YL83Driver)
+
+
+def create_drivers(simulated=False, weather=None):
+    """Returns the hardware drivers, or simulated drivers with the same names and channels."""
+    if not simulated:
+        return [driver() for driver in HARDWARE_DRIVERS]
+    weather = weather or SimulatedWeather()
+    return [SimulatedRainDriver(weather) if driver is YL83Driver else
+            SimulatedDriver(weather, driver.name, driver.channels) for driver in HARDWARE_DRIVERS]
@@ -1,6 +1,34 @@
-from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QTextEdit,
-                             QHBoxLayout, QSizePolicy, QVBoxLayout, QScrollArea)
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import (QWidget, QLabel, QPushButton, QListView,
+                             QHBoxLayout, QSizePolicy, QVBoxLayout, QAbstractItemView)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex
+
+
+class ErrorListModel(QAbstractListModel):
+    """Newest-first view of the error journal; the text of a row is only built when the row is painted."""
+
+    def __init__(self, journal):
+        super().__init__()
+        self.journal = journal
+        self.entries = []
+        self.revision = None
+
+    def refresh(self):
+        """Picks up the journal changes made since the last refresh."""
+        if self.revision == self.journal.revision:
+            return
+        self.beginResetModel()
+        self.entries = self.journal.snapshot()
+        self.revision = self.journal.revision
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.entries[len(self.entries) - 1 - index.row()].text()
+        return None
+
 
 class ErrorConsole(QWidget):
     def __init__(self, theme, backend):
@@ -9,7 +37,10 @@ class ErrorConsole(QWidget):
         self.theme = theme
         self.backend = backend
         self.title = QLabel("Errors detected:")
-        self.error_window = QTextEdit()
+        self.status_label = QLabel()
+        self.error_model = ErrorListModel(self.backend.errors)
+        self.error_window = QListView()
+        self.error_window.setModel(self.error_model)
 
         self.back_button = QPushButton("Main menu")
         self.back_button.clicked.connect(self.close)
@@ -17,60 +48,73 @@ class ErrorConsole(QWidget):
         self.clear_button = QPushButton("Clear errors")
         self.clear_button.clicked.connect(self.clear_button_clicked)
 
-        self.scroll_area = QScrollArea()
-        self.scroll_area.setVerticalScrollBarPolicy(2)
-        self.errors_widget = QWidget()
         self.layout()
         self.styling()
-        self.display_errors()
-
 
+    def showEvent(self, event):
+        """Shows the errors collected up to now every time the console is opened."""
+        self.display_errors()
+        super().showEvent(event)
 
     def display_errors(self):
         """Displays errors in the error console"""
-        if self.backend.errors:
-            for error in self.backend.errors:
-                self.styling()
-                self.error_window.append(error)
-                self.error_window.append(81 * "-")
-
+        self.error_model.refresh()
+        if not self.backend.available:
+            self.clear_button.setDisabled(True)
+            self.show_status("Station daemon unavailable")
+        elif self.backend.errors:
+            self.clear_button.setDisabled(False)
+            self.show_status(None)
         else:
-            self.error_window.setStyleSheet("color: #11c208;"
-                                            "font-size: 30px;")
-            self.error_window.append("<center><h1>No errors detected</h1></center>")
             self.clear_button.setDisabled(True)
+            self.show_status("No errors detected")
 
     def clear_button_clicked(self):
         """Clears console"""
-        self.error_window.clear()
         self.backend.errors.clear()
-        self.error_window.setStyleSheet("color: #11c208;"
-                                        "font-size: 30px;")
-        self.error_window.append("<center><h1>Error console cleared!</h1><center>")
+        self.error_model.refresh()
+        self.clear_button.setDisabled(True)
+        self.show_status("Error console cleared!" if self.backend.available else "Station daemon unavailable")
+
+    def show_status(self, message):
+        """Shows `message` in place of the error list, or the list itself when there is no message."""
+        self.status_label.setVisible(message is not None)
+        self.error_window.setVisible(message is None)
+        if message is not None:
+            self.status_label.setText(message)
 
     def styling(self):
         """Sets styling"""
         self.title.setStyleSheet("font-size: 35px;")
+        self.status_label.setStyleSheet("color: #11c208; font-size: 45px;")
         self.back_button.setStyleSheet("font-size: 25px;")
         self.clear_button.setStyleSheet("font-size: 25px;"
                                         "background-color: darkred;"
                                         "color: white;")
         self.title.setAlignment(Qt.AlignCenter)
+        self.status_label.setAlignment(Qt.AlignCenter)
 
         style = ("""
-                    QTextEdit {
+                    QListView {
                         border: 3px solid darkred;   /* Zielona ramka */
                         border-radius: 10px;          /* Zaokrąglone rogi */
                         padding: 10px;                /* Wewnętrzne marginesy */
                         font-size: 30px;              /* Rozmiar czcionki */
-                    }sc
+                    }
+                    QListView::item {
+                        border-bottom: 1px solid gray;
+                        padding: 5px 0px;
+                    }
                 """)
 
         self.error_window.setStyleSheet(style)
-        self.error_window.setReadOnly(True)
+        # Every row has two lines, so the view never measures more than one of them
+        self.error_window.setUniformItemSizes(True)
+        self.error_window.setWordWrap(False)
+        self.error_window.setSelectionMode(QAbstractItemView.NoSelection)
+        self.error_window.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
         self.error_window.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-
-        self.scroll_area.setWidgetResizable(True)
+        self.status_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
 
     def layout(self):
         """Manages layout"""
@@ -78,14 +122,6 @@ class ErrorConsole(QWidget):
         top_layout = QHBoxLayout()
         top_layout.addWidget(self.title)
 
-
-        errors_layout = QVBoxLayout()
-        errors_layout.addWidget(self.error_window)
-
-
-        self.errors_widget.setLayout(errors_layout)
-        self.scroll_area.setWidget(self.errors_widget)
-
         bottom_layout = QHBoxLayout()
         bottom_layout.addStretch(1)
         bottom_layout.addWidget(self.clear_button)
@@ -95,7 +131,8 @@ class ErrorConsole(QWidget):
 
         main_layout = QVBoxLayout()
         main_layout.addLayout(top_layout)
-        main_layout.addWidget(self.scroll_area)
+        main_layout.addWidget(self.error_window)
+        main_layout.addWidget(self.status_label)
         main_layout.addLayout(bottom_layout)
 
-        self.setLayout(main_layout)
\ No newline at end of file
+        self.setLayout(main_layout)
@@ -0,0 +1,108 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+ERROR_LOG_PATH = "meteo_errors.log"
+
+
+class ErrorEntry:
+    """One kind of error: where it came from, what was raised and how many times it repeated."""
+
+    __slots__ = ("source", "error_type", "context", "detail", "first_seen", "last_seen", "count")
+
+    def __init__(self, source, error_type, context, detail, timestamp):
+        self.source = source
+        self.error_type = error_type
+        self.context = context
+        self.detail = detail
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.count = 1
+
+    @property
+    def key(self):
+        return self.source, self.error_type, self.context
+
+    def text(self):
+        """Two-line description shown in the error console."""
+        first = datetime.fromtimestamp(self.first_seen).strftime("%Y-%m-%d %H:%M")
+        line = f"At {first} {self.error_type} occurred when {self.context}."
+        if self.count > 1:
+            last = datetime.fromtimestamp(self.last_seen).strftime("%Y-%m-%d %H:%M")
+            line += f" Repeated {self.count} times, last at {last}."
+        return f"{line}\n{self.detail}"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        entry = cls(data["source"], data["error_type"], data["context"], data["detail"], data["first_seen"])
+        entry.last_seen = data["last_seen"]
+        entry.count = data["count"]
+        return entry
+
+
+class ErrorJournal:
+    """
+    Bounded journal of errors. An error repeating one already in the journal (same source,
+    exception type and context) only bumps the count and last time of that entry.
+    Beyond `max_entries` the least recently seen entries move to a JSON-lines log on disk,
+    which is rotated to `<path>.1` once it grows past `max_bytes`.
+    """
+
+    def __init__(self, max_entries=10000, path=ERROR_LOG_PATH, max_bytes=1_000_000):
+        self.max_entries = max_entries
+        self.path = path
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.revision = 0
+
+    def record(self, source, error, context, detail="", timestamp=None):
+        """Adds an exception (or an exception type name) raised by `source` while doing `context`."""
+        error_type = error if isinstance(error, str) else type(error).__name__
+        timestamp = timestamp or time.time()
+        key = (source, error_type, context)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = ErrorEntry(source, error_type, context, detail, timestamp)
+            if len(self.entries) > self.max_entries:
+                self.archive([self.entries.popitem(last=False)[1]])
+        else:
+            entry.count += 1
+            entry.last_seen = timestamp
+            self.entries.move_to_end(key)
+        self.revision += 1
+
+    def snapshot(self):
+        """Entries from the least to the most recently seen."""
+        return list(self.entries.values())
+
+    def clear(self):
+        """Moves every entry to the on-disk log."""
+        self.archive(self.entries.values())
+        self.entries.clear()
+        self.revision += 1
+
+    def archive(self, entries):
+        """Appends entries to the on-disk log; failing to write it never breaks the caller."""
+        entries = list(entries)
+        if self.path is None or not entries:
+            return
+        try:
+            if os.path.exists(self.path) and os.path.getsize(self.path) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, "a", encoding="utf-8") as file:
+                for entry in entries:
+                    file.write(json.dumps(entry.to_dict()) + "\n")
+        except OSError:
+            pass
+
+    def close(self):
+        """Keeps the entries of this session on disk."""
+        self.archive(self.entries.values())
+
+    def __len__(self):
+        return len(self.entries)
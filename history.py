@@ -0,0 +1,217 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+import numpy as np
+
+CHANNELS = ("room_temp", "outside_temp", "humidity", "pressure", "rain", "rain_transitions", "rain_wet_fraction")
+# Channels read as running totals; the history keeps their increase over each logged interval,
+# and the wet seconds as the fraction of that interval the plate was wet
+COUNTER_CHANNELS = ("rain_transitions", "rain_wet_seconds")
+# Memory-mapped ring shared by the daemon with the kiosk, in RAM where /dev/shm exists
+SHARED_HISTORY_PATH = os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+                                   "meteo_history")
+# Longest time a reader waits for a write of the shared ring to end (seconds)
+SHARED_READ_TIMEOUT = 0.5
+
+
+class HistoryStore:
+    """
+    Fixed-capacity ring buffer holding one float column per channel and a shared column of
+    integer epoch-second timestamps.
+    Every sample is written twice, `capacity` slots apart, so the newest samples always form
+    one contiguous slice that can be handed to the plot without copying.
+    """
+
+    def __init__(self, channels=CHANNELS, capacity=20):
+        self.channels = tuple(channels)
+        self.capacity = int(capacity)
+        self._rows = {name: row for row, name in enumerate(self.channels)}
+        self._times = np.zeros(2 * self.capacity, dtype=np.int64)
+        self._values = np.full((len(self.channels), 2 * self.capacity), np.nan)
+        self._head = 0
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, values):
+        """Adds one sample in O(1); channels missing from `values` are stored as NaN."""
+        head = self._head
+        mirror = head + self.capacity
+        column = [values.get(name, np.nan) for name in self.channels]
+        self._times[head] = self._times[mirror] = int(timestamp)
+        self._values[:, head] = self._values[:, mirror] = column
+        self._head = (head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, timestamps, columns):
+        """Adds many samples at once; `columns` maps channel names to arrays aligned with `timestamps`."""
+        timestamps = np.asarray(timestamps)[-self.capacity:].astype(np.int64)
+        count = len(timestamps)
+        if not count:
+            return
+        positions = (self._head + np.arange(count)) % self.capacity
+        block = np.full((len(self.channels), count), np.nan)
+        for name, row in self._rows.items():
+            if name in columns:
+                block[row] = np.asarray(columns[name], dtype=float)[-count:]
+        for offset in (0, self.capacity):
+            self._times[positions + offset] = timestamps
+            self._values[:, positions + offset] = block
+        self._head = (self._head + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+
+    def _window(self, count):
+        """Returns the slice covering the newest `count` samples."""
+        count = self._size if count is None else max(0, min(int(count), self._size))
+        end = self._head + self.capacity
+        return slice(end - count, end)
+
+    @staticmethod
+    def _read_only(view):
+        view.flags.writeable = False
+        return view
+
+    def timestamps(self, count=None):
+        """Read-only view of the newest `count` timestamps, oldest first."""
+        return self._read_only(self._times[self._window(count)])
+
+    def values(self, channel, count=None):
+        """Read-only view of the newest `count` values of `channel`, oldest first."""
+        return self._read_only(self._values[self._rows[channel], self._window(count)])
+
+    def latest(self):
+        """Returns (timestamp, {channel: value}) of the newest sample or None when empty."""
+        if not self._size:
+            return None
+        position = (self._head - 1) % self.capacity
+        return (int(self._times[position]),
+                {name: float(self._values[row, position]) for name, row in self._rows.items()})
+
+
+class SharedHistoryStore(HistoryStore):
+    """
+    HistoryStore kept in a memory-mapped file, normally under /dev/shm, so that other processes map
+    the same ring and read the recent samples without copies. Only the process that created the file
+    writes; every write bumps a generation counter that is odd while the write is in progress, and
+    readers retry a read that overlapped one. Views stay valid but are not frozen: once the ring is
+    full, each append overwrites the oldest sample at the start of the views handed out before it.
+    Readers in other processes use `copy_range`, which copies all columns under one generation.
+    Reads raise TimeoutError when a write never ends, e.g. because the writer died in the middle of it.
+    """
+
+    # Header fields, one int64 each
+    CAPACITY, HEAD, SIZE, GENERATION = range(4)
+    HEADER_BYTES = 4 * 8
+
+    def __init__(self, path=SHARED_HISTORY_PATH, channels=CHANNELS, capacity=20, create=False):
+        self.path = path
+        self.channels = tuple(channels)
+        self.capacity = int(capacity)
+        self._rows = {name: row for row, name in enumerate(self.channels)}
+        times_bytes = 2 * self.capacity * 8
+        size = self.HEADER_BYTES + times_bytes + len(self.channels) * times_bytes
+        if create:
+            # A reader still mapping the previous file keeps it until it attaches to this one
+            if os.path.exists(path):
+                os.unlink(path)
+            memory = np.memmap(path, dtype=np.uint8, mode="w+", shape=(size,))
+        else:
+            memory = np.memmap(path, dtype=np.uint8, mode="r")
+            if memory.size != size:
+                raise ValueError(f"{path} does not hold {len(self.channels)} channels of {self.capacity} samples")
+        self._memory = memory
+        self._header = np.ndarray((4,), dtype=np.int64, buffer=memory)
+        self._times = np.ndarray((2 * self.capacity,), dtype=np.int64, buffer=memory, offset=self.HEADER_BYTES)
+        self._values = np.ndarray((len(self.channels), 2 * self.capacity), dtype=float, buffer=memory,
+                                  offset=self.HEADER_BYTES + times_bytes)
+        if create:
+            self._header[:] = (self.capacity, 0, 0, 0)
+            self._values.fill(np.nan)
+        elif self._header[self.CAPACITY] != self.capacity:
+            raise ValueError(f"{path} holds a ring of {self._header[self.CAPACITY]} samples, not {self.capacity}")
+
+    @property
+    def _head(self):
+        return int(self._header[self.HEAD])
+
+    @_head.setter
+    def _head(self, value):
+        self._header[self.HEAD] = value
+
+    @property
+    def _size(self):
+        return int(self._header[self.SIZE])
+
+    @_size.setter
+    def _size(self, value):
+        self._header[self.SIZE] = value
+
+    @contextmanager
+    def _writing(self):
+        self._header[self.GENERATION] += 1
+        try:
+            yield
+        finally:
+            self._header[self.GENERATION] += 1
+
+    def _stable(self, read, timeout=SHARED_READ_TIMEOUT):
+        """Runs `read` until it did not overlap a write of the owning process."""
+        deadline = time.monotonic() + timeout
+        while True:
+            generation = self._header[self.GENERATION]
+            if not generation % 2:
+                result = read()
+                if self._header[self.GENERATION] == generation:
+                    return result
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{self.path} has been in the middle of a write for {timeout} s")
+            time.sleep(0)
+
+    def append(self, timestamp, values):
+        with self._writing():
+            super().append(timestamp, values)
+
+    def extend(self, timestamps, columns):
+        with self._writing():
+            super().extend(timestamps, columns)
+
+    def __len__(self):
+        return self._size
+
+    def timestamps(self, count=None):
+        return self._stable(lambda: super(SharedHistoryStore, self).timestamps(count))
+
+    def values(self, channel, count=None):
+        return self._stable(lambda: super(SharedHistoryStore, self).values(channel, count))
+
+    def latest(self):
+        return self._stable(super().latest)
+
+    def copy_range(self, start, end):
+        """
+        Returns copies of the timestamps and of every column between start and end, all taken from the
+        same state of the ring, or None when the ring no longer reaches back to `start`.
+        """
+
+        def reading():
+            # Head and size read once, the slices below must agree with each other
+            head, size = self._head, self._size
+            window = slice(head + self.capacity - size, head + self.capacity)
+            times = self._times[window]
+            if size == self.capacity and times[0] > start:
+                return None
+            first = window.start + int(np.searchsorted(times, start, side="left"))
+            last = window.start + int(np.searchsorted(times, end, side="right"))
+            return (self._times[first:last].copy(),
+                    {name: self._values[row, first:last].copy() for name, row in self._rows.items()})
+
+        return self._stable(reading)
+
+    def unlink(self):
+        """Removes the file; processes that mapped it keep their mapping."""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
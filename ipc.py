@@ -0,0 +1,431 @@
+import builtins
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+from acquisition import SensorSnapshot
+from backend import BackendBase
+from error_journal import ErrorEntry
+from history import SharedHistoryStore, CHANNELS
+from metrics import shared_metrics
+from scheduler import Scheduler
+
+SOCKET_PATH = os.path.join(tempfile.gettempdir(), "meteo-station.sock")
+# Longest wait for the daemon to answer a request (seconds)
+IPC_TIMEOUT = 2.0
+# Time the kiosk leaves an unreachable daemon alone before trying it again (seconds)
+RETRY_DELAY = 10.0
+
+
+def encode(message, arrays=None):
+    """
+    Frames a message as one JSON line followed by the raw bytes of its NumPy arrays,
+    which the JSON header lists as [name, dtype, length].
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in (arrays or {}).items()}
+    header = dict(message, arrays=[[name, array.dtype.str, len(array)] for name, array in arrays.items()],
+                  bytes=sum(array.nbytes for array in arrays.values()))
+    line = json.dumps(header, default=lambda value: value.item()).encode("utf-8")
+    return b"".join([line, b"\n"] + [array.tobytes() for array in arrays.values()])
+
+
+class MessageReader:
+    """Splits the bytes read from a socket back into (message, {name: array}) pairs."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.header = None
+
+    def feed(self, data):
+        self.buffer += data
+        messages = []
+        while True:
+            if self.header is None:
+                end = self.buffer.find(b"\n")
+                if end < 0:
+                    break
+                self.header = json.loads(self.buffer[:end])
+                del self.buffer[:end + 1]
+            size = self.header["bytes"]
+            if len(self.buffer) < size:
+                break
+            payload = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            arrays = {}
+            offset = 0
+            for name, dtype, length in self.header.pop("arrays"):
+                arrays[name] = np.frombuffer(payload, dtype=dtype, count=length, offset=offset)
+                offset += arrays[name].nbytes
+            messages.append((self.header, arrays))
+            self.header = None
+        return messages
+
+
+def daemon_running(path=SOCKET_PATH, timeout=IPC_TIMEOUT):
+    """Returns whether a station daemon accepts connections on `path`."""
+    socket = QLocalSocket()
+    socket.connectToServer(path)
+    running = socket.waitForConnected(int(timeout * 1000))
+    socket.abort()
+    return running
+
+
+_remote_error_types = {}
+
+
+def remote_error(name, message):
+    """
+    Rebuilds an exception raised in the daemon. Builtin types come back as themselves and others
+    as a stand-in class of the same name, so describe_error sorts them as before.
+    """
+    error_type = getattr(builtins, name, None)
+    if not (isinstance(error_type, type) and issubclass(error_type, Exception)):
+        error_type = _remote_error_types.setdefault(name, type(name, (Exception,), {}))
+    return error_type(message)
+
+
+def snapshot_to_dict(snapshot):
+    return {"timestamp": snapshot.timestamp,
+            "values": snapshot.values,
+            "errors": {channel: [type(e).__name__, str(e)] for channel, e in snapshot.errors.items()}}
+
+
+def snapshot_from_dict(data):
+    return SensorSnapshot(data["timestamp"], data["values"],
+                          {channel: remote_error(*error) for channel, error in data["errors"].items()})
+
+
+class BackendServer(QObject):
+    """
+    Serves the daemon's Backend to kiosk processes over a local socket. Every snapshot is pushed to
+    all attached clients; history ranges, rollup series and the error journal are answered on request.
+    Requests carrying an "id" get a reply with the same id, others (e.g. "acquire") get none.
+    """
+
+    def __init__(self, backend, path=SOCKET_PATH):
+        super().__init__()
+        self.backend = backend
+        self.path = path
+        self.clients = {}
+        self.handlers = {"hello": self.hello,
+                         "acquire": self.acquire,
+                         "snapshot": self.state,
+                         "bounds": self.bounds,
+                         "series": self.series,
+                         "range": self.range,
+                         "errors": self.errors,
+                         "clear_errors": self.clear_errors,
+                         "diagnostics": self.diagnostics}
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.accepting)
+        # Only a socket file left behind by a daemon that crashed is removed, it would make listen() fail
+        if daemon_running(path):
+            raise OSError(f"a station daemon is already listening on {path}")
+        QLocalServer.removeServer(path)
+        if not self.server.listen(path):
+            raise OSError(f"cannot listen on {path}: {self.server.errorString()}")
+        self.backend.snapshot_taken.connect(self.publishing)
+
+    def accepting(self):
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            self.clients[client] = MessageReader()
+            client.readyRead.connect(lambda client=client: self.reading(client))
+            client.disconnected.connect(lambda client=client: self.dropping(client))
+
+    def dropping(self, client):
+        self.clients.pop(client, None)
+        client.deleteLater()
+
+    def reading(self, client):
+        reader = self.clients.get(client)
+        if reader is None:
+            return
+        for message, _ in reader.feed(bytes(client.readAll())):
+            try:
+                reply, arrays = self.handlers[message["op"]](**message.get("args", {}))
+            except Exception as e:
+                reply, arrays = {"error": f"{type(e).__name__}: {e}"}, None
+            if "id" in message:
+                client.write(encode(dict(reply, id=message["id"]), arrays))
+
+    def publishing(self, snapshot):
+        """Pushes a new snapshot to every attached kiosk."""
+        data = encode(dict(self.state()[0], push="snapshot"))
+        for client in self.clients:
+            client.write(data)
+
+    def hello(self):
+        history = self.backend.history
+        return {"history_path": history.path, "channels": list(history.channels),
+                "capacity": history.capacity}, None
+
+    def acquire(self):
+        self.backend.request_snapshot()
+        return {}, None
+
+    def state(self):
+        snapshot = self.backend.snapshot
+        return {"snapshot": snapshot_to_dict(snapshot) if snapshot is not None else None,
+                "errors_revision": self.backend.errors.revision,
+                "error_count": len(self.backend.errors)}, None
+
+    def bounds(self):
+        return {"bounds": self.backend.history_bounds()}, None
+
+    def series(self, channel, start, end, points):
+        # Raw samples are read by the kiosk from the shared ring, only rollups are sent
+        if self.backend.rollups.tier_for(start, end, points) is None:
+            return {"raw": True}, None
+        times, means, minimums, maximums = self.backend.series(channel, start, end, points)
+        return {}, {"times": times, "means": means, "minimums": minimums, "maximums": maximums}
+
+    def range(self, start, end):
+        times, columns = self.backend.read_range(start, end)
+        return {}, dict(columns, times=times)
+
+    def errors(self):
+        return {"entries": [entry.to_dict() for entry in self.backend.errors.snapshot()],
+                "revision": self.backend.errors.revision}, None
+
+    def clear_errors(self):
+        self.backend.errors.clear()
+        return {"revision": self.backend.errors.revision}, None
+
+    def diagnostics(self):
+        """The daemon's metrics and job statistics; metric keys travel as [name, [[label, value], ...]]."""
+        counters, histograms = self.backend.metrics.snapshot()
+        return {"counters": [[name, labels, value] for (name, labels), value in counters.items()],
+                "histograms": [[name, labels, *statistics] for (name, labels), statistics in histograms.items()],
+                "jobs": self.backend.scheduler.summary()}, None
+
+    def close(self):
+        self.server.close()
+        for client in list(self.clients):
+            client.disconnectFromServer()
+        QLocalServer.removeServer(self.path)
+
+
+class RemoteErrorJournal:
+    """The daemon's ErrorJournal as seen from the kiosk; entries are only fetched when the console asks."""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.revision = 0
+        self.count = 0
+
+    def snapshot(self):
+        """Returns the daemon's entries, or none while it cannot be reached."""
+        try:
+            reply, _ = self.backend.call("errors")
+        except (ConnectionError, RuntimeError) as e:
+            self.backend.failed(e)
+            # Unknown until the daemon answers again, so the console fetches the entries then
+            self.revision = None
+            return []
+        self.revision = reply["revision"]
+        self.count = len(reply["entries"])
+        return [ErrorEntry.from_dict(entry) for entry in reply["entries"]]
+
+    def clear(self):
+        """Clears the daemon's journal; the entries stay while it cannot be reached."""
+        try:
+            reply, _ = self.backend.call("clear_errors")
+        except (ConnectionError, RuntimeError) as e:
+            self.backend.failed(e)
+            return
+        self.revision = reply["revision"]
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+
+class RemoteBackend(BackendBase):
+    """
+    Stands in for Backend in the kiosk while the station daemon runs. Live snapshots are pushed
+    over the local socket, the recent history is read in place from the daemon's shared ring, and
+    older ranges and rollups are asked for. The kiosk runs its own scheduler and metrics; those of
+    the daemon are fetched for the Diagnostics screen.
+    Raises ConnectionError when no daemon is listening at startup. A daemon lost later shows as
+    "daemon unavailable" on the tiles, requests fall back to the last known or empty data, and
+    a reconnect is tried at most every RETRY_DELAY seconds, so the GUI is not blocked on each one.
+    """
+
+    def __init__(self, path=SOCKET_PATH, timeout=IPC_TIMEOUT, scheduler=None):
+        super().__init__()
+        self.path = path
+        self.timeout = timeout
+        self.scheduler = scheduler or Scheduler()
+        self.metrics = shared_metrics()
+        self.errors = RemoteErrorJournal(self)
+        self.history = None
+        self.snapshot = None
+        self.reader = MessageReader()
+        self.replies = {}
+        self.pushes = []
+        self.last_id = 0
+        self.calling = False
+        self.available = True
+        self.retry_at = 0.0
+        self.bounds = None
+        self.socket = QLocalSocket(self)
+        self.socket.readyRead.connect(self.reading)
+        self.connecting()
+
+    def connecting(self):
+        """Attaches to the daemon, maps its history ring and picks up its latest snapshot."""
+        self.socket.abort()
+        self.reader = MessageReader()
+        self.socket.connectToServer(self.path)
+        if not self.socket.waitForConnected(int(self.timeout * 1000)):
+            raise ConnectionError(f"no station daemon at {self.path}: {self.socket.errorString()}")
+        hello, _ = self.call("hello")
+        self.history = SharedHistoryStore(hello["history_path"], hello["channels"], hello["capacity"])
+        state, _ = self.call("snapshot")
+        self.available = True
+        self.updating_state(state)
+
+    def send(self, message):
+        if self.socket.state() != QLocalSocket.ConnectedState:
+            if time.monotonic() < self.retry_at:
+                raise ConnectionError("the station daemon is unavailable")
+            self.connecting()
+        self.socket.write(encode(message))
+        self.socket.flush()
+
+    def call(self, op, **args):
+        """Sends a request and waits for its reply, keeping pushes that arrive meanwhile for later."""
+        self.last_id += 1
+        request_id = self.last_id
+        self.send({"op": op, "id": request_id, "args": args})
+        self.calling = True
+        try:
+            deadline = time.monotonic() + self.timeout
+            while request_id not in self.replies:
+                remaining = deadline - time.monotonic()
+                # readyRead may already have stored the reply from inside waitForReadyRead
+                if (remaining <= 0 or not self.socket.waitForReadyRead(int(remaining * 1000))) \
+                        and request_id not in self.replies:
+                    self.socket.abort()
+                    raise ConnectionError(f"the station daemon did not answer {op}")
+                self.reading()
+        finally:
+            self.calling = False
+        if self.pushes:
+            QTimer.singleShot(0, self.dispatching)
+        reply, arrays = self.replies.pop(request_id)
+        if "error" in reply:
+            raise RuntimeError(f"the station daemon failed on {op}: {reply['error']}")
+        return reply, arrays
+
+    def reading(self):
+        for message, arrays in self.reader.feed(bytes(self.socket.readAll())):
+            if "id" in message:
+                self.replies[message["id"]] = (message, arrays)
+            else:
+                self.pushes.append(message)
+        if self.pushes and not self.calling:
+            self.dispatching()
+
+    def dispatching(self):
+        pushes, self.pushes = self.pushes, []
+        for push in pushes:
+            self.updating_state(push)
+
+    def updating_state(self, state):
+        self.errors.revision = state["errors_revision"]
+        self.errors.count = state["error_count"]
+        if state["snapshot"] is not None:
+            self.snapshot = snapshot_from_dict(state["snapshot"])
+            self.snapshot_taken.emit(self.snapshot)
+
+    def failed(self, error):
+        """
+        Records a request that failed. A daemon that is gone or stuck is shown as unavailable on the
+        tiles and not asked again before RETRY_DELAY; the next request after that reconnects.
+        """
+        self.metrics.increment("meteo_ipc_failures_total", error=type(error).__name__)
+        if isinstance(error, RuntimeError):
+            # The daemon answered, only this request failed
+            return
+        self.socket.abort()
+        self.retry_at = time.monotonic() + RETRY_DELAY
+        if self.available:
+            self.available = False
+            lost = ConnectionError("the station daemon is unavailable")
+            self.snapshot = SensorSnapshot(time.time(), {channel: float("nan") for channel in CHANNELS},
+                                           {channel: lost for channel in CHANNELS})
+            self.snapshot_taken.emit(self.snapshot)
+
+    def daemon_diagnostics(self):
+        """Returns the daemon's (counters, histograms, jobs) as metrics.snapshot() and scheduler.summary() do."""
+        try:
+            reply, _ = self.call("diagnostics")
+        except (ConnectionError, RuntimeError) as e:
+            self.failed(e)
+            return None
+        key = lambda name, labels: (name, tuple(tuple(label) for label in labels))
+        counters = {key(name, labels): value for name, labels, value in reply["counters"]}
+        histograms = {key(name, labels): tuple(statistics) for name, labels, *statistics in reply["histograms"]}
+        return counters, histograms, reply["jobs"]
+
+    def request_snapshot(self):
+        """Asks the daemon for a new snapshot, which comes back as a push; a missing daemon is retried later."""
+        try:
+            self.send({"op": "acquire"})
+        except ConnectionError as e:
+            self.failed(e)
+
+    def history_bounds(self):
+        """Returns the daemon's history bounds, or the last known ones while it cannot be reached."""
+        try:
+            bounds = self.call("bounds")[0]["bounds"]
+        except (ConnectionError, RuntimeError) as e:
+            self.failed(e)
+            return self.bounds
+        self.bounds = tuple(bounds) if bounds is not None else None
+        return self.bounds
+
+    def newest_time(self):
+        try:
+            return super().newest_time()
+        except TimeoutError as e:
+            self.failed(e)
+            return 0
+
+    def read_range(self, start, end):
+        """
+        Returns raw samples between start and end, copied from the shared ring when it reaches back far enough.
+        Nothing is returned while the daemon cannot be reached.
+        """
+        try:
+            copied = self.history.copy_range(start, end)
+            if copied is None:
+                _, arrays = self.call("range", start=start, end=end)
+                return arrays.pop("times"), arrays
+            return copied
+        except (ConnectionError, RuntimeError, TimeoutError) as e:
+            self.failed(e)
+            return np.empty(0, dtype=np.int64), {name: np.empty(0) for name in self.history.channels}
+
+    def series(self, channel, start, end, points):
+        """Returns times with the mean, min and max of `channel`, as Backend.series does; nothing while the daemon is unavailable."""
+        try:
+            reply, arrays = self.call("series", channel=channel, start=start, end=end, points=points)
+        except (ConnectionError, RuntimeError) as e:
+            self.failed(e)
+            reply, arrays = {}, {"times": np.empty(0), "means": np.empty(0),
+                                 "minimums": np.empty(0), "maximums": np.empty(0)}
+        if reply.get("raw"):
+            times, columns = self.read_range(start, end)
+            values = columns[channel]
+            return times, values, values, values
+        return arrays["times"], arrays["means"], arrays["minimums"], arrays["maximums"]
+
+    def close(self):
+        """Detaches from the daemon, which keeps logging."""
+        self.socket.disconnectFromServer()
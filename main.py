@@ -1,33 +1,51 @@
 import sys
-from plot_window import PlotWindow
-from world_weather import WorldWeather
+import time
+
+STARTED = time.perf_counter()
+# Installed before the other imports so that they are timed too
+PROFILER = None
+if "--profile-startup" in sys.argv:
+    from startup_profiler import StartupProfiler
+    PROFILER = StartupProfiler(STARTED)
+
 from PyQt5.QtWidgets import (QMainWindow, QApplication, QLabel, QPushButton, QWidget,
                              QHBoxLayout,
                              QVBoxLayout, QSizePolicy, QGridLayout, )
-from PyQt5.QtGui import QFont, QIcon
-from PyQt5.QtCore import Qt, QTimer, QSize
+from PyQt5.QtGui import QFont
+from PyQt5.QtCore import Qt, QSize, QTimer
 from datetime import datetime
 from backend import Backend
+from drivers import create_drivers
+from ipc import RemoteBackend
 from error_console import ErrorConsole
+from diagnostics import DiagnosticsWindow
+from cities import POLAND_CITIES, WORLD_CAPITALS
+from window_manager import WindowManager
+from pixmap_cache import shared_pixmap_cache
+from theme import theme_for
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, simulated=False):
         """Initializes the main application window and its components."""
         super().__init__()
         self.central_widget = QWidget()
         self.dark_mode = True
         self.app = QApplication.instance()
 
-        set_theme(self.app, self.dark_mode)
+        self.theme = set_theme(self.app, self.dark_mode)
         self.window_width = 1024
         self.window_height = 600
         self.setGeometry(0, 0, self.window_width, self.window_height)
         self.showFullScreen()
         self.resize(1024, 600)
 
-        self.backend = Backend()
-        self.error_console = None
+        self.backend = connecting_backend(simulated)
+        self.pixmaps = shared_pixmap_cache()
+        self.weather_prefetcher = None
+        # requests and dotenv are only loaded once the kiosk is on screen
+        QTimer.singleShot(10000, self.starting_prefetcher)
+        self.windows = WindowManager(1024, 600)
         # Buttons
         self.room_temperature = QPushButton(self)
         self.outside_temperature = QPushButton(self)
@@ -36,9 +54,10 @@ class MainWindow(QMainWindow):
         self.rain_detector = QPushButton(self)
         self.online_weather = QPushButton(self)
         self.darkmode_button = QPushButton(self)
-        self.darkmode_button.setIcon(QIcon("icons/mode_icon.png"))
+        self.darkmode_button.setIcon(self.pixmaps.icon("icons/mode_icon.png"))
         self.warning_button = QPushButton(self)
-        self.warning_button.setIcon(QIcon("icons/warning.png"))
+        self.warning_button.setIcon(self.pixmaps.icon("icons/warning.png"))
+        self.diagnostics_button = QPushButton("Diagnostics", self)
 
         self.all_buttons = [self.room_temperature, self.outside_temperature, self.air_humidity,
                             self.atmospheric_pressure, self.rain_detector, self.online_weather]
@@ -46,6 +65,7 @@ class MainWindow(QMainWindow):
         self.weather_buttons = [self.room_temperature, self.outside_temperature, self.air_humidity,
                                 self.atmospheric_pressure, self.rain_detector]
 
+        self.tile_channels = ["room_temp", "outside_temp", "humidity", "pressure", "rain"]
         self.buttons_names = ["Temperature", "Outside", "Room Humidity", "Pressure", "Precipitation", "World weather"]
         self.button_icons = ["icons/room.png", "icons/outside.png", "icons/humidity.png",
                              "icons/meter.png", "icons/rain.png", "icons/online.png"]
@@ -62,12 +82,6 @@ class MainWindow(QMainWindow):
         self.time_label.setText(self.time)
         self.date_label.setText(self.date)
 
-        # Timer
-        self.timer = QTimer()
-        self.timer.start(5000)
-
-        self.widget_window = None
-
         # Initializing functions
         self.declaring_layouts()
         self.updating_weather_parameters()
@@ -76,6 +90,9 @@ class MainWindow(QMainWindow):
         self.sizing_policy()
         self.datetime_style()
         self.connecting_buttons()
+        self.registering_windows()
+        if self.backend.snapshot is not None:
+            self.showing_snapshot(self.backend.snapshot)
 
     def building_buttons(self):
         """Creates buttons and assigns labels and icons to them."""
@@ -90,7 +107,7 @@ class MainWindow(QMainWindow):
             button_name_label.setEnabled(False)
 
             icon_label = QLabel(self)
-            icon_label.setPixmap(QIcon(f"{self.button_icons[i]}").pixmap(60, 60))
+            icon_label.setPixmap(self.pixmaps.pixmap(self.button_icons[i], 60, 60))
             icon_label.setAlignment(Qt.AlignCenter)
             icon_label.setStyleSheet("background-color: transparent;")
 
@@ -108,13 +125,16 @@ class MainWindow(QMainWindow):
             self.all_buttons[i].setLayout(button_layout)
 
     def updating_weather_parameters(self):
-        """Connects functions updating weather data to the timer."""
-        self.timer.timeout.connect(lambda: self.backend.update_date_and_time_short(self.time_label, self.date_label))
-        self.timer.timeout.connect(lambda: self.backend.get_room_temp(self.all_buttons[0]))
-        self.timer.timeout.connect(lambda: self.backend.get_outside_temp(self.all_buttons[1]))
-        self.timer.timeout.connect(lambda: self.backend.get_humidity(self.all_buttons[2]))
-        self.timer.timeout.connect(lambda: self.backend.get_atm_pressure(self.all_buttons[3]))
-        self.timer.timeout.connect(lambda: self.backend.get_rain_info(self.all_buttons[4]))
+        """Schedules the clock and a single sensor read shared by every tile every 5 seconds."""
+        scheduler = self.backend.scheduler
+        scheduler.add("main clock", lambda: self.backend.update_date_and_time_short(self.time_label, self.date_label), 5)
+        scheduler.add("sensors", self.backend.request_snapshot, 5, priority=20)
+        self.backend.snapshot_taken.connect(self.showing_snapshot)
+
+    def showing_snapshot(self, snapshot):
+        """Updates the weather tiles from one sensor snapshot."""
+        for button, channel in zip(self.weather_buttons, self.tile_channels):
+            button.setText(self.backend.format_reading(snapshot, channel))
 
     def button_styling(self):
         """Styles buttons in the user interface."""
@@ -130,6 +150,7 @@ class MainWindow(QMainWindow):
         self.darkmode_button.setIconSize(QSize(30, 30))
         self.warning_button.setMinimumSize(20, 20)
         self.warning_button.setIconSize(QSize(30, 30))
+        self.diagnostics_button.setStyleSheet("font-size: 20px;")
 
     def sizing_policy(self):
         """Sets the size policy for buttons."""
@@ -147,31 +168,49 @@ class MainWindow(QMainWindow):
             self.all_buttons[i].clicked.connect(lambda _, button_index=i: self.button_clicked(button_index))
         self.darkmode_button.clicked.connect(self.mode_button_clicked)
         self.warning_button.clicked.connect(self.warning_button_clicked)
+        self.diagnostics_button.clicked.connect(self.diagnostics_button_clicked)
 
 
+    def starting_prefetcher(self):
+        """Starts refreshing the World Weather cache in the background."""
+        from weather_client import shared_client
+        from weather_prefetch import WeatherPrefetcher
+        self.weather_prefetcher = WeatherPrefetcher(shared_client(), POLAND_CITIES + WORLD_CAPITALS)
+        self.weather_prefetcher.start(self.backend.scheduler, delay=0)
+
+    def stopping_prefetcher(self):
+        if self.weather_prefetcher is not None:
+            self.weather_prefetcher.stop()
+
+    def registering_windows(self):
+        """Declares every secondary window; each one is built on its first open and reused afterwards."""
+        for button_name in self.buttons_names:
+            if button_name == "World weather":
+                self.windows.register(button_name, building_world_weather)
+            else:
+                self.windows.register(button_name,
+                                      lambda name=button_name: building_plot_window(name, self.backend, self.theme))
+        self.windows.register("Error console", lambda: ErrorConsole(self.theme, self.backend))
+        self.windows.register("Diagnostics", lambda: DiagnosticsWindow(self.backend))
+
     def button_clicked(self, button_index):
         """Handles button clicks and opens appropriate windows."""
         button_name = self.buttons_names[button_index]
-        theme = set_theme(self.app, self.dark_mode)
-
-        if button_name == "World weather":
-            self.widget_window = WorldWeather()
-        else:
-            self.widget_window = PlotWindow(button_name, self.backend, theme)
-        self.widget_window.showFullScreen()
-        self.widget_window.resize(1024, 600)
+        self.windows.show(button_name)
 
     def mode_button_clicked(self):
         """Toggles between light and dark mode."""
         self.dark_mode = not self.dark_mode
-        set_theme(self.app, self.dark_mode)
+        self.theme = set_theme(self.app, self.dark_mode)
+        self.windows.apply_theme(self.theme)
 
     def warning_button_clicked(self):
         """Opens Error Console"""
-        theme = set_theme(self.app, self.dark_mode)
-        self.error_console = ErrorConsole(theme, self.backend)
-        self.error_console.showFullScreen()
-        self.error_console.resize(1024, 600)
+        self.windows.show("Error console")
+
+    def diagnostics_button_clicked(self):
+        """Opens the sensor, storage, plot and HTTP timings"""
+        self.windows.show("Diagnostics")
 
     def declaring_layouts(self):
         """Creates and arranges the GUI layouts."""
@@ -197,6 +236,7 @@ class MainWindow(QMainWindow):
 
         lower_layout = QHBoxLayout()
         lower_layout.addWidget(self.warning_button)
+        lower_layout.addWidget(self.diagnostics_button)
         lower_layout.addStretch(1)
         lower_layout.addWidget(self.darkmode_button)
 
@@ -210,27 +250,52 @@ class MainWindow(QMainWindow):
 
 
 def set_theme(app, dark_mode=True):
-    """Sets the application's theme based on the dark mode setting."""
-    if dark_mode:
-        app.setStyleSheet("""
-            QWidget { background-color: #2C2F33; color: white; }
-            QPushButton { background-color: #293442; color: white; font-size: 35px; font-weight: bold; }
-            QLabel { color: #BDC3C7; font-size: 25px; font-weight: bold; }
-        """)
-        return {"axis_color": "white", "labels_color": "white"}
-
-    else:
-        app.setStyleSheet("""
-            QWidget { background-color: #b7b6ba; color: black; }
-            QPushButton { background-color: #E0E0E0; color: black; font-size: 35px; font-weight: bold; }
-            QLabel { color: black; font-size: 25px; font-weight: bold; }
-        """)
-        return {"axis_color": "black", "labels_color": "black"}
+    """Applies the light or dark theme, restyling the application only when the mode changed."""
+    theme = theme_for(dark_mode)
+    theme.apply(app)
+    return theme
+
+WORLD_WEATHER_ICONS = [("icons/outside.png", 70, 70), ("icons/wind_icon.png", 70, 70),
+                       ("icons/meter.png", 70, 70), ("icons/humidity.png", 70, 70)]
+
+
+def building_plot_window(button_name, backend, theme):
+    """Imports pyqtgraph on the first plot instead of at startup."""
+    from plot_window import PlotWindow
+    return PlotWindow(button_name, backend, theme)
+
+
+def building_world_weather():
+    """Imports requests and dotenv on the first World Weather open instead of at startup."""
+    from world_weather import WorldWeather
+    return WorldWeather()
+
+
+def connecting_backend(simulated=False):
+    """Attaches to the station daemon (meteod.py) when it runs, otherwise reads the sensors in this process."""
+    try:
+        return RemoteBackend()
+    except ConnectionError:
+        return Backend(drivers=create_drivers(simulated))
+
 
 def main():
+    # --profile-startup prints import and first-paint timings, then exits
+    if PROFILER is not None:
+        PROFILER.mark("imports done")
     app = QApplication(sys.argv)
     set_theme(app, dark_mode=True)
-    window = MainWindow()
+    if PROFILER is not None:
+        PROFILER.mark("QApplication ready")
+    # --simulate replaces the sensors with a simulated weather model
+    window = MainWindow(simulated="--simulate" in sys.argv)
+    app.aboutToQuit.connect(window.backend.close)
+    app.aboutToQuit.connect(window.stopping_prefetcher)
+    # Icons of the World Weather screen are decoded while the kiosk idles
+    window.pixmaps.warm(WORLD_WEATHER_ICONS)
+    if PROFILER is not None:
+        PROFILER.mark("main window built")
+        PROFILER.watch_first_paint(window, app)
     window.show()
     sys.exit(app.exec_())
 
@@ -0,0 +1,56 @@
+"""
+Headless meteo station daemon: reads the sensors and logs them without a display.
+
+    python meteod.py [--simulate] [--api]
+
+Only QtCore and QtNetwork are loaded, no widgets and no plotting, so it runs on a Pi without a
+display server. The kiosk (main.py) attaches to it over a Unix socket, reads the recent history
+straight from a shared memory ring and can be closed or restarted while logging goes on.
+With --api, readings and history are also served as HTTP/JSON on port 8080 to other machines.
+"""
+import signal
+import sys
+from PyQt5.QtCore import QCoreApplication, QTimer
+from backend import Backend, HISTORY_CAPACITY
+from drivers import create_drivers
+from history import SharedHistoryStore, SHARED_HISTORY_PATH, CHANNELS
+from ipc import BackendServer, SOCKET_PATH, daemon_running
+from read_api import ReadApi, API_PORT
+
+
+def main():
+    app = QCoreApplication(sys.argv)
+    # A second daemon would unlink the socket and shared ring of the first and log to the same database
+    if daemon_running(SOCKET_PATH):
+        print(f"a station daemon is already running on {SOCKET_PATH}", file=sys.stderr)
+        sys.exit(1)
+    history = SharedHistoryStore(SHARED_HISTORY_PATH, CHANNELS, HISTORY_CAPACITY, create=True)
+    # --simulate replaces the sensors with a simulated weather model
+    backend = Backend(drivers=create_drivers("--simulate" in sys.argv), history=history)
+    server = BackendServer(backend, SOCKET_PATH)
+    api = None
+    if "--api" in sys.argv:
+        api = ReadApi(backend, host="0.0.0.0", port=API_PORT)
+        api.start()
+        print(f"read API listening on port {api.port}", flush=True)
+
+    def stopping():
+        if api is not None:
+            api.close()
+        server.close()
+        backend.close()
+        history.unlink()
+
+    app.aboutToQuit.connect(stopping)
+    for number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(number, lambda *_: app.quit())
+    # Python only runs signal handlers between bytecodes, the idle timer gives it the chance
+    signal_timer = QTimer()
+    signal_timer.start(500)
+    signal_timer.timeout.connect(lambda: None)
+    print(f"meteo station daemon listening on {SOCKET_PATH}", flush=True)
+    sys.exit(app.exec_())
+
+
+if __name__ == "__main__":
+    main()
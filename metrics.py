@@ -0,0 +1,140 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_PATH = "meteo_metrics.prom"
+# Upper bounds of the latency histogram buckets (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Latency histogram over fixed buckets; the last bucket counts everything above the largest bound."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th quantile, the largest observation for the last bucket."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.count if self.count else 0.0
+
+
+class Metrics:
+    """
+    Counters and latency histograms of the hot paths (sensor reads, storage writes, plot renders,
+    HTTP calls), keyed by metric name and labels. Safe to update from any thread.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(name, labels):
+        return name, tuple(sorted(labels.items()))
+
+    def increment(self, name, amount=1, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = self.key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name, failures=None, **labels):
+        """
+        Records how long the block took in histogram `name`.
+        When the block raises, counter `failures` is also incremented, labelled with the exception type.
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            if failures is not None:
+                self.increment(failures, error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self):
+        """Returns copies of the counters and (count, mean, p95, max) of every histogram."""
+        with self.lock:
+            counters = dict(self.counters)
+            histograms = {key: (histogram.count, histogram.mean(), histogram.quantile(0.95), histogram.max)
+                          for key, histogram in self.histograms.items()}
+        return counters, histograms
+
+    @staticmethod
+    def format_labels(labels, extra=()):
+        pairs = [f'{name}="{value}"' for name, value in labels + tuple(extra)]
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def prometheus_text(self):
+        """Renders every metric in the Prometheus text exposition format."""
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, list(histogram.counts), histogram.sum, histogram.count, histogram.buckets)
+                                for key, histogram in self.histograms.items())
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} counter")
+            lines.append(f"{name}{self.format_labels(labels)} {value}")
+        for (name, labels), counts, total, count, buckets in histograms:
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{self.format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{self.format_labels(labels)} {total}")
+            lines.append(f"{name}_count{self.format_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=METRICS_PATH):
+        """Atomically rewrites `path`, e.g. for the textfile collector of the Prometheus node exporter."""
+        temporary = path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(self.prometheus_text())
+        os.replace(temporary, path)
+
+
+_shared_metrics = None
+
+
+def shared_metrics():
+    """Returns the metrics registry shared by the whole application."""
+    global _shared_metrics
+    if _shared_metrics is None:
+        _shared_metrics = Metrics()
+    return _shared_metrics
@@ -0,0 +1,93 @@
+import threading
+from PyQt5.QtCore import QSize, Qt
+from PyQt5.QtGui import QIcon, QImage, QImageReader, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+
+class PixmapCache:
+    """
+    Process-wide cache of decoded and scaled icons keyed by (path, width, height, device pixel ratio).
+    Images can be decoded ahead of time on a background thread (QImage is safe to use there);
+    they only become QPixmaps, which must be created on the GUI thread, when first asked for.
+    """
+
+    def __init__(self):
+        self.pixmaps = {}
+        self.icons = {}
+        self.prepared = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def device_pixel_ratio():
+        app = QApplication.instance()
+        return app.devicePixelRatio() if app is not None else 1.0
+
+    @staticmethod
+    def load_image(path, width, height, ratio):
+        """Decodes `path` scaled to fit width x height physical pixels, keeping its aspect ratio."""
+        reader = QImageReader(path)
+        size = reader.size()
+        box = QSize(round(width * ratio), round(height * ratio))
+        # Like QIcon.pixmap(), icons are scaled down but never up
+        if size.isValid() and (size.width() > box.width() or size.height() > box.height()):
+            reader.setScaledSize(size.scaled(box, Qt.KeepAspectRatio))
+        image = reader.read()
+        return image if not image.isNull() else QImage()
+
+    def pixmap(self, path, width, height):
+        """Returns the icon at `path` scaled to fit width x height, decoding it only once per size."""
+        ratio = self.device_pixel_ratio()
+        key = (path, width, height, ratio)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            with self.lock:
+                image = self.prepared.pop(key, None)
+            if image is None:
+                image = self.load_image(path, width, height, ratio)
+            pixmap = QPixmap.fromImage(image)
+            pixmap.setDevicePixelRatio(ratio)
+            self.pixmaps[key] = pixmap
+        return pixmap
+
+    def icon(self, path):
+        """Returns one shared QIcon per path."""
+        icon = self.icons.get(path)
+        if icon is None:
+            icon = self.icons[path] = QIcon(path)
+        return icon
+
+    def weather_pixmap(self, icon, content):
+        """Returns the pixmap of a downloaded OpenWeatherMap icon, decoding each icon code once."""
+        key = ("openweathermap", icon)
+        pixmap = self.pixmaps.get(key)
+        if pixmap is None:
+            pixmap = QPixmap()
+            pixmap.loadFromData(content)
+            self.pixmaps[key] = pixmap
+        return pixmap
+
+    def warm(self, requests):
+        """Decodes (path, width, height) icons on a background thread so later screens open without disk I/O."""
+        ratio = self.device_pixel_ratio()
+
+        def decode():
+            for path, width, height in requests:
+                key = (path, width, height, ratio)
+                if key in self.pixmaps:
+                    continue
+                image = self.load_image(path, width, height, ratio)
+                with self.lock:
+                    self.prepared[key] = image
+
+        threading.Thread(target=decode, name="pixmap-warmup", daemon=True).start()
+
+
+_shared_cache = None
+
+
+def shared_pixmap_cache():
+    """Returns the pixmap cache shared by every window."""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = PixmapCache()
+    return _shared_cache
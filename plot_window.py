@@ -1,9 +1,28 @@
 from PyQt5.QtWidgets import (QLabel, QPushButton, QWidget, QHBoxLayout,
                              QVBoxLayout)
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import Qt, QEvent, QTimer
 from datetime import datetime
 import pyqtgraph as pg
+from decimation import DecimationCache
+
+# Visible time span of the 1H and 10H views (seconds)
+PLOT_SPANS = {"1h": 3600, "24h": 36000}
+# Narrowest span the plot can be zoomed in to (seconds)
+MIN_PLOT_SPAN = 600
+# Markers are only drawn while this few points are visible
+MAX_SYMBOL_POINTS = 60
+
+PLOT_COLORS = {"Temperature": "#b3221d",
+               "Outside": "#e06016",
+               "Room Humidity": "#1c2d9c",
+               "Pressure": "#3aa11b",
+               "Precipitation": "#7f18a1"}
+PLOTTED_DATA = {"Temperature": "room_temp",
+                "Outside": "outside_temp",
+                "Room Humidity": "humidity",
+                "Pressure": "pressure",
+                "Precipitation": "rain_wet_fraction"}
 
 
 class PlotWindow(QWidget):
@@ -16,6 +35,8 @@ class PlotWindow(QWidget):
         self.backend = backend
         self.axis_name = None
         self.plot_choice = "1h"
+        # The 1H/10H views follow new samples until the plot is panned or zoomed by hand
+        self.following = True
 
         if self.button_name == "Temperature" or self.button_name == "Outside":
             self.axis_name = "Temperature (°C)"
@@ -24,7 +45,7 @@ class PlotWindow(QWidget):
         elif self.button_name == "Pressure":
             self.axis_name = "Pressure (hPa)"
         elif self.button_name == "Precipitation":
-            self.axis_name = "Rain"
+            self.axis_name = "Wet time (fraction)"
 
         # Time and date labels
         self.time_label = QLabel(self)
@@ -50,17 +71,28 @@ class PlotWindow(QWidget):
         self.buttons = [self.return_button, self.one_hour_button, self.hour_24_button]
         self.return_button.clicked.connect(self.close)
 
-        # Setting Timers
-        self.timer = QTimer()
-        self.timer2 = QTimer()
-        self.timer.start(1000)
-        self.timer2.start(60000)
+        # Scheduled jobs, they only run while the window is shown
+        self.clock_job = f"{button_name} plot clock"
+        self.refresh_job = f"{button_name} plot refresh"
 
         # Declaring plot
-        self.parameters_plot = pg.PlotWidget()
+        # Tick labels are formatted by the axis for the visible range only
+        self.parameters_plot = pg.PlotWidget(axisItems={"bottom": pg.DateAxisItem(orientation="bottom")})
+        self.plotted_data_key = PLOTTED_DATA.get(self.button_name)
+        plot_color_key = PLOT_COLORS.get(self.button_name)
+        self.decimation = DecimationCache(
+            lambda start, end, points: self.backend.series(self.plotted_data_key, start, end, points))
+        self.curve = self.parameters_plot.plot(pen=pg.mkPen(color=plot_color_key, width=4),
+                                               symbol='o', symbolSize=9,
+                                               symbolBrush=plot_color_key, connect="finite")
+        self.plot_symbol = 'o'
+        self.view_box = self.parameters_plot.getViewBox()
+        # Range changes are drawn once per event loop pass, however many a drag produces
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.setSingleShot(True)
+        self.redraw_timer.timeout.connect(self.drawing_range)
 
         # Functions
-        self.updating_plot()
         self.creating_layouts()
         self.button_style()
         self.connecting_to_timers()
@@ -68,6 +100,7 @@ class PlotWindow(QWidget):
         self.time_labels_style()
         self.button_style()
         self.creating_plot()
+        self.enabling_zoom()
 
     def button_style(self):
         """Applies styling to buttons."""
@@ -86,9 +119,30 @@ class PlotWindow(QWidget):
             each_label.setStyleSheet("font-size: 25px; font-weight: bold;")
 
     def connecting_to_timers(self):
-        """Connects timers to update time and plot periodically."""
-        self.timer.timeout.connect(lambda: self.backend.update_date_and_time(self.time_label, self.date_label))
-        self.timer2.timeout.connect(self.updating_plot)
+        """Registers the jobs updating time and plot periodically."""
+        scheduler = self.backend.scheduler
+        scheduler.add(self.clock_job, lambda: self.backend.update_date_and_time(self.time_label, self.date_label), 1,
+                      enabled=False)
+        scheduler.add(self.refresh_job, self.updating_plot, 60, enabled=False)
+
+    def showEvent(self, event):
+        """Resumes the jobs and catches the plot up with data logged while the window was hidden."""
+        self.backend.update_date_and_time(self.time_label, self.date_label)
+        self.updating_plot()
+        self.backend.scheduler.resume(self.clock_job, self.refresh_job)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        """Stops all updates while the window is hidden."""
+        self.backend.scheduler.pause(self.clock_job, self.refresh_job)
+        super().hideEvent(event)
+
+    def apply_theme(self, theme):
+        """Restyles the plot axes after the light/dark mode changed."""
+        if theme is self.theme:
+            return
+        self.theme = theme
+        self.creating_plot()
 
     def connecting_buttons(self):
         """Connects buttons to appropriate functions."""
@@ -99,25 +153,52 @@ class PlotWindow(QWidget):
         """Handles click event for 1H button."""
         self.plot_choice = "1h"
         print(f"Plot choice changed to: {self.plot_choice}")
+        self.following = True
         self.updating_plot()
 
     def hour_24_clicked(self):
         """Handles click event for 24H button."""
         self.plot_choice = "24h"
         print(f"Plot choice changed to: {self.plot_choice}")
+        self.following = True
         self.updating_plot()
-        print(self.backend.hours["hours_24h"])
-        print(self.backend.data["room_temp_24h"])
+
+    def enabling_zoom(self):
+        """Lets the time axis be dragged and pinched (or wheel-zoomed) over the whole stored history."""
+        self.view_box.setMouseEnabled(x=True, y=False)
+        self.view_box.enableAutoRange(axis=pg.ViewBox.YAxis)
+        self.view_box.setAutoVisible(y=True)
+        self.view_box.sigXRangeChanged.connect(lambda *_: self.redraw_timer.start(0))
+        self.view_box.sigRangeChangedManually.connect(self.range_changed_by_hand)
+        self.parameters_plot.viewport().grabGesture(Qt.PinchGesture)
+        self.parameters_plot.viewport().installEventFilter(self)
+
+    def range_changed_by_hand(self, *_):
+        self.following = False
+
+    def eventFilter(self, watched, event):
+        """Zooms the time axis around the centre of a pinch gesture."""
+        if event.type() == QEvent.Gesture:
+            pinch = event.gesture(Qt.PinchGesture)
+            if pinch is not None:
+                factor = pinch.scaleFactor()
+                if factor > 0:
+                    center = self.view_box.mapSceneToView(self.parameters_plot.mapToScene(
+                        self.parameters_plot.viewport().mapFromGlobal(pinch.centerPoint().toPoint())))
+                    self.view_box.scaleBy(x=1 / factor, center=center)
+                    self.following = False
+                return True
+        return super().eventFilter(watched, event)
+
     def configure_axis(self, axis, font_size=12):
         """Configures axis appearance with font size and colors."""
         axis.setTickFont(pg.QtGui.QFont('Arial', font_size))
-        axis.setTextPen(pg.mkPen(self.theme["labels_color"]))
-        axis.setPen(pg.mkPen(color=self.theme["axis_color"], width=2))
+        axis.setTextPen(self.theme.text_pen)
+        axis.setPen(self.theme.axis_pen)
 
     def creating_plot(self):
         """Creates and configures the plot widget."""
-        labels_color = self.theme["labels_color"]
-        styles = {"font-size": "25px", "font-weight": "bold", "color": labels_color}
+        styles = self.theme.axis_label_style
         self.parameters_plot.setBackground("transparent")
         x_axis = self.parameters_plot.getAxis('bottom')
         y_axis = self.parameters_plot.getAxis('left')
@@ -127,32 +208,34 @@ class PlotWindow(QWidget):
         self.parameters_plot.setLabel("left", self.axis_name, **styles)
 
     def updating_plot(self):
-        """Updates the plot with new data based on the selected time range."""
-
-        time_key = "time_1h" if self.plot_choice == "1h" else "time_24h"
-        plot_colors = {"Temperature": "#b3221d",
-                       "Outside": "#e06016",
-                       "Room Humidity": "#1c2d9c",
-                       "Pressure": "#3aa11b",
-                       "Precipitation": "#7f18a1"}
-        plotted_data = {"Temperature": "room_temp",
-                        "Outside": "outside_temp",
-                        "Room Humidity": "humidity",
-                        "Pressure": "pressure",
-                        "Precipitation": "rain"}
-        plotted_data_key = plotted_data.get(self.button_name)
-        plot_color_key = plot_colors.get(self.button_name)
-        hour_labels = [(time, label) for time, label in
-                       zip(self.backend.hours[time_key], self.backend.hours[f"hours_{self.plot_choice}"])]
-        x_axis = self.parameters_plot.getAxis('bottom')
-        x_axis.setTicks([hour_labels])
-        self.parameters_plot.plot(
-            self.backend.hours[time_key],
-            self.backend.data[f"{plotted_data_key}_{self.plot_choice}"],
-            pen=pg.mkPen(color=plot_color_key, width=4),
-            symbol='o', symbolSize=9,
-            symbolBrush=plot_color_key,
-            clear=True)
+        """
+        Moves a following 1H/10H view to the present and picks up samples logged since the last refresh.
+        """
+        now = datetime.now().timestamp()
+        bounds = self.backend.history_bounds()
+        oldest = bounds[0] if bounds is not None else now
+        span = PLOT_SPANS[self.plot_choice]
+        self.view_box.setLimits(xMin=min(oldest, now - span), xMax=now + span, minXRange=MIN_PLOT_SPAN)
+        if self.following:
+            self.view_box.setXRange(now - span, now, padding=0)
+        self.drawing_range()
+
+    def drawing_range(self):
+        """Draws the visible time range from the level-of-detail cache, about one point per pixel column."""
+        with self.backend.metrics.timer("meteo_plot_render_seconds", window=self.button_name):
+            self.redraw_timer.stop()
+            start, end = self.view_box.viewRange()[0]
+            newest = self.backend.newest_time()
+            columns = max(1, int(self.view_box.width()) or self.width())
+            x, y, decimated = self.decimation.curve(start, end, columns, newest)
+            if not self.backend.available:
+                # Ranges read while the daemon is away are empty, they must not stay cached
+                self.decimation.clear()
+            symbol = 'o' if not decimated and len(x) <= MAX_SYMBOL_POINTS else None
+            if symbol != self.plot_symbol:
+                self.plot_symbol = symbol
+                self.curve.setSymbol(symbol)
+            self.curve.setData(x, y)
 
     def creating_layouts(self):
         date_time_layout = QHBoxLayout()
@@ -0,0 +1,109 @@
+import threading
+import time
+
+# A new wet/dry level only counts once it has held this long (seconds)
+RAIN_DEBOUNCE = 2.0
+
+
+class RainEvents:
+    """
+    Debounced wet/dry state of the rain plate with running totals of wet/dry transitions and wet time.
+    Levels are reported from GPIO edge callbacks; a change is only accepted once the new level has
+    held for `debounce` seconds, and is then dated from its first edge. A bounce back to the
+    accepted level before that cancels the change.
+    """
+
+    def __init__(self, wet=False, debounce=RAIN_DEBOUNCE, clock=time.monotonic):
+        self.debounce = debounce
+        self.clock = clock
+        self.wet = wet
+        self.changed_at = clock()
+        self.pending_since = None
+        self.transitions = 0
+        self.wet_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def edge(self, wet, at=None):
+        """Reports the level of the plate after an edge; safe to call from the GPIO callback thread."""
+        with self.lock:
+            at = self.clock() if at is None else at
+            self.settle(at)
+            if wet == self.wet:
+                self.pending_since = None
+            elif self.pending_since is None:
+                self.pending_since = at
+
+    def settle(self, now):
+        """Accepts a pending change once it has held for the debounce time."""
+        if self.pending_since is not None and now - self.pending_since >= self.debounce:
+            if self.wet:
+                self.wet_seconds += self.pending_since - self.changed_at
+            self.wet = not self.wet
+            self.changed_at = self.pending_since
+            self.pending_since = None
+            self.transitions += 1
+
+    def totals(self):
+        """Returns (wet now, transitions so far, wet seconds so far, the current wet spell included)."""
+        with self.lock:
+            now = self.clock()
+            self.settle(now)
+            wet_seconds = self.wet_seconds + (now - self.changed_at if self.wet else 0.0)
+            return self.wet, self.transitions, wet_seconds
+
+
+class MockGPIO:
+    """
+    Stand-in for the RPi.GPIO module: inputs are set with `set_input` and edge callbacks
+    fire at once, as the interrupt thread of the real module would call them.
+    """
+    BOARD = "BOARD"
+    BCM = "BCM"
+    IN = "IN"
+    LOW = 0
+    HIGH = 1
+    RISING = "RISING"
+    FALLING = "FALLING"
+    BOTH = "BOTH"
+
+    def __init__(self, level=HIGH):
+        self.default_level = level
+        self.levels = {}
+        self.callbacks = {}
+
+    def setmode(self, mode):
+        pass
+
+    def setwarnings(self, enabled):
+        pass
+
+    def setup(self, pin, direction, **kwargs):
+        self.levels.setdefault(pin, self.default_level)
+
+    def input(self, pin):
+        return self.levels[pin]
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        self.callbacks[pin] = (edge, callback)
+
+    def remove_event_detect(self, pin):
+        self.callbacks.pop(pin, None)
+
+    def cleanup(self, pin=None):
+        if pin is None:
+            self.levels.clear()
+            self.callbacks.clear()
+        else:
+            self.levels.pop(pin, None)
+            self.callbacks.pop(pin, None)
+
+    def set_input(self, pin, level):
+        """Changes the level of an input pin, firing its edge callback when the edge matches."""
+        previous = self.levels.get(pin)
+        self.levels[pin] = level
+        if previous == level or pin not in self.callbacks:
+            return
+        edge, callback = self.callbacks[pin]
+        rising = level == self.HIGH
+        if callback is not None and (edge == self.BOTH or edge == (self.RISING if rising else self.FALLING)):
+            callback(pin)
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlsplit, parse_qs
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+API_PORT = 8080
+# Samples written per HTTP chunk of a streamed response
+CHUNK_ROWS = 1000
+# Longest wait for the Qt thread to answer a query (seconds)
+QUERY_TIMEOUT = 10.0
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class BackendBridge(QObject):
+    """Runs queries against the Backend on the Qt thread it belongs to, for callers on other threads."""
+    requested = pyqtSignal(object, object)
+
+    def __init__(self):
+        super().__init__()
+        # Emitted from the API thread, so the slot is queued to the thread owning the bridge
+        self.requested.connect(self.running)
+
+    def call(self, function):
+        future = Future()
+        self.requested.emit(function, future)
+        return future
+
+    @pyqtSlot(object, object)
+    def running(self, function, future):
+        try:
+            future.set_result(function())
+        except Exception as e:
+            future.set_exception(e)
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def json_rows(times, columns):
+    """Encodes samples as the comma-separated JSON arrays [timestamp, value, ...], NaN as null."""
+    values = np.column_stack(columns) if columns else np.empty((len(times), 0))
+    cells = values.astype(object)
+    cells[np.isnan(values)] = None
+    return ",".join(json.dumps([timestamp] + row, allow_nan=False)
+                    for timestamp, row in zip(times.tolist(), cells.tolist()))
+
+
+class ReadApi:
+    """
+    Read-only HTTP/JSON API of the station, served by asyncio on its own thread:
+
+        GET /api/current                                    latest snapshot
+        GET /api/history?start=&end=&channels=a,b           raw samples, streamed in chunks
+        GET /api/rollups?tier=1h&channel=&start=&end=       bucket mean, min and max, streamed in chunks
+
+    Times are epoch seconds; start defaults to a day before end and end to now. Every response
+    carries an ETag, and a request whose If-None-Match still matches gets an empty 304 without
+    the data being read. Snapshots come from the Backend's latest reading, so polling never
+    reads the sensors; history and rollups are copied out on the Qt thread, history one chunk at a time.
+    """
+
+    def __init__(self, backend, host="127.0.0.1", port=API_PORT):
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.bridge = BackendBridge()
+        self.metrics = backend.metrics
+        # Tells ETags of one run from those of an earlier one, whose counters started over
+        self.session = f"{int(time.time()):x}"
+        self.current_cache = (None, None, None)
+        self.endpoints = {"/api/current": self.current,
+                          "/api/history": self.history,
+                          "/api/rollups": self.rollups}
+        self.loop = None
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        """Starts serving on a background thread; raises OSError when the port cannot be bound."""
+        started = threading.Event()
+        failure = []
+
+        def serving():
+            self.loop = asyncio.new_event_loop()
+            try:
+                self.server = self.loop.run_until_complete(
+                    asyncio.start_server(self.handling, self.host, self.port))
+            except OSError as e:
+                failure.append(e)
+                started.set()
+                self.loop.close()
+                return
+            self.port = self.server.sockets[0].getsockname()[1]
+            started.set()
+            self.loop.run_forever()
+            self.server.close()
+            self.loop.run_until_complete(self.server.wait_closed())
+            self.loop.close()
+
+        self.thread = threading.Thread(target=serving, name="read api", daemon=True)
+        self.thread.start()
+        started.wait()
+        if failure:
+            raise failure[0]
+
+    def close(self):
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(QUERY_TIMEOUT)
+
+    async def handling(self, reader, writer):
+        """Answers one request per connection."""
+        endpoint = "unknown"
+        try:
+            request = await reader.readline()
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            try:
+                method, target, _ = request.decode("latin-1").split(" ", 2)
+            except ValueError:
+                raise ApiError(400, "malformed request line")
+            url = urlsplit(target)
+            handler = self.endpoints.get(url.path)
+            if handler is None:
+                raise ApiError(404, f"no endpoint {url.path}")
+            endpoint = url.path
+            if method != "GET":
+                raise ApiError(405, "only GET is supported")
+            query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+            with self.metrics.timer("meteo_api_request_seconds", endpoint=endpoint):
+                await handler(writer, headers, query)
+        except ApiError as e:
+            await self.respond(writer, e.status, json.dumps({"error": str(e)}).encode("utf-8"))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            await self.respond(writer, 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode("utf-8"))
+        finally:
+            self.metrics.increment("meteo_api_requests_total", endpoint=endpoint)
+            writer.close()
+
+    @staticmethod
+    def head(status, etag=None, chunked=False, length=0):
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}", "Content-Type: application/json",
+                 "Cache-Control: no-cache", "Connection: close"]
+        if etag is not None:
+            lines.append(f"ETag: {etag}")
+        if chunked:
+            lines.append("Transfer-Encoding: chunked")
+        elif status != 304:
+            lines.append(f"Content-Length: {length}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def respond(self, writer, status, body=b"", etag=None):
+        writer.write(self.head(status, etag, length=len(body)) + body)
+        await writer.drain()
+
+    @staticmethod
+    def not_modified(headers, etag):
+        tags = headers.get("if-none-match", "")
+        return tags.strip() == "*" or etag in (tag.strip() for tag in tags.split(","))
+
+    async def current(self, writer, headers, query):
+        """Latest snapshot, encoded once per snapshot however many clients poll it."""
+        snapshot = self.backend.snapshot
+        if snapshot is None:
+            raise ApiError(404, "no reading has been taken yet")
+        cached, etag, body = self.current_cache
+        if cached is not snapshot:
+            body = json.dumps({"timestamp": snapshot.timestamp,
+                               "values": {channel: value if value == value else None
+                                          for channel, value in snapshot.values.items()},
+                               "errors": {channel: self.backend.describe_error(error)
+                                          for channel, error in snapshot.errors.items()}}).encode("utf-8")
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            self.current_cache = (snapshot, etag, body)
+        if self.not_modified(headers, etag):
+            await self.respond(writer, 304, etag=etag)
+        else:
+            await self.respond(writer, 200, body, etag)
+
+    def version_tag(self, *parts):
+        """
+        ETag of a query; it changes with every logged sample, which is also when history and rollups do.
+        `parts` must not hold the current time, or every poll of an open-ended range would get a new tag.
+        """
+        key = "|".join(str(part) for part in parts)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+        return f'W/"{self.session}-{self.backend.counter}-{digest}"'
+
+    @staticmethod
+    def time_range(query):
+        """
+        Returns (start, end, tag): the range in epoch seconds and the parts naming it in an ETag,
+        where the ends left out stay symbolic ("now" and "1 day before end").
+        """
+        try:
+            end = float(query["end"]) if "end" in query else time.time()
+            start = float(query["start"]) if "start" in query else end - 86400
+        except ValueError:
+            raise ApiError(400, "start and end must be epoch seconds")
+        # float() also takes nan and inf, which no comparison below would catch
+        if not (math.isfinite(start) and math.isfinite(end)):
+            raise ApiError(400, "start and end must be finite epoch seconds")
+        if start > end:
+            raise ApiError(400, "start is after end")
+        tag = (repr(start) if "start" in query else "end-1d", repr(end) if "end" in query else "now")
+        return start, end, tag
+
+    async def query(self, function):
+        return await asyncio.wait_for(asyncio.wrap_future(self.bridge.call(function)), QUERY_TIMEOUT)
+
+    async def history(self, writer, headers, query):
+        start, end, tag = self.time_range(query)
+        channels = query["channels"].split(",") if "channels" in query else list(self.backend.history.channels)
+        unknown = set(channels) - set(self.backend.history.channels)
+        if unknown:
+            raise ApiError(400, f"unknown channels: {', '.join(sorted(unknown))}")
+        etag = self.version_tag("history", *tag, *channels)
+        if self.not_modified(headers, etag):
+            await self.respond(writer, 304, etag=etag)
+            return
+
+        def reading(first):
+            # Copied on the Qt thread, the ring buffer views change with the next sample
+            times, columns = self.backend.read_range(first, end, CHUNK_ROWS)
+            return np.array(times), [np.array(columns[channel], dtype=float) for channel in channels]
+
+        async def pages():
+            # One query per chunk, so a long range never holds the Qt thread or every row at once
+            first = start
+            while True:
+                times, columns = await self.query(lambda: reading(first))
+                yield times, columns
+                if len(times) < CHUNK_ROWS:
+                    return
+                # Timestamps are unique whole seconds
+                first = int(times[-1]) + 1
+
+        await self.streaming(writer, etag, {"columns": ["timestamp"] + channels}, "rows", pages())
+
+    async def rollups(self, writer, headers, query):
+        start, end, tag = self.time_range(query)
+        tiers = {tier.name: tier for tier in self.backend.rollups.tiers}
+        tier = tiers.get(query.get("tier"))
+        if tier is None:
+            raise ApiError(400, f"tier must be one of {', '.join(tiers)}")
+        channel = query.get("channel")
+        if channel not in self.backend.rollups.channels:
+            raise ApiError(400, "channel is missing or unknown")
+        etag = self.version_tag("rollups", tier.name, channel, *tag)
+        if self.not_modified(headers, etag):
+            await self.respond(writer, 304, etag=etag)
+            return
+
+        def reading():
+            times, means, minimums, maximums = self.backend.rollups.series(tier, channel, start, end)
+            return np.array(times), [np.array(column, dtype=float) for column in (means, minimums, maximums)]
+
+        async def pages():
+            # Buckets are few enough to be read at once
+            times, columns = await self.query(reading)
+            for first in range(0, len(times), CHUNK_ROWS):
+                last = first + CHUNK_ROWS
+                yield times[first:last], [column[first:last] for column in columns]
+
+        await self.streaming(writer, etag, {"tier": tier.name, "channel": channel,
+                                            "columns": ["timestamp", "mean", "min", "max"]}, "rows", pages())
+
+    async def streaming(self, writer, etag, header, key, pages):
+        """Sends {**header, key: [rows]} with chunked transfer encoding, one chunk per (times, columns) page."""
+
+        async def chunk(text):
+            data = text.encode("utf-8")
+            writer.write(f"{len(data):x}\r\n".encode("latin-1") + data + b"\r\n")
+            await writer.drain()
+
+        writer.write(self.head(200, etag, chunked=True))
+        opening = json.dumps(header)[:-1] + f', "{key}": ['
+        await chunk(opening)
+        separator = ""
+        async for times, columns in pages:
+            if len(times):
+                await chunk(separator + json_rows(times, columns))
+                separator = ","
+        await chunk("]}")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
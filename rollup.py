@@ -0,0 +1,175 @@
+import time
+import numpy as np
+from history import HistoryStore, CHANNELS
+from storage import HistoryDatabase
+
+# (tier name, bucket length in seconds, buckets kept in memory)
+TIERS = (("30min", 1800, 672),
+         ("1h", 3600, 1488),
+         ("1d", 86400, 1830),
+         ("1w", 604800, 1040))
+AGGREGATES = ("min", "max", "mean", "count")
+DAY = 86400
+WEEK = 604800
+
+
+def aggregate_columns(channels):
+    """Column names of a rollup table, e.g. room_temp_min, room_temp_max, ..."""
+    return tuple(f"{name}_{aggregate}" for name in channels for aggregate in AGGREGATES)
+
+
+def bucket_start(timestamp, length):
+    """Returns the start of the bucket holding `timestamp`, aligned to local midnight and Monday."""
+    local = time.localtime(timestamp)
+    if length < DAY:
+        shift = local.tm_gmtoff
+        return (timestamp + shift) // length * length - shift
+    # Days and weeks follow the calendar, so they last an hour more or less across a DST change
+    days_back = local.tm_wday if length == WEEK else 0
+    return int(time.mktime((local.tm_year, local.tm_mon, local.tm_mday - days_back, 0, 0, 0, 0, 0, -1)))
+
+
+def bucket_end(start, length):
+    """Returns the start of the bucket following the one starting at `start`."""
+    return bucket_start(start + length * 3 // 2, length)
+
+
+class RollupTier:
+    """Keeps min/max/mean/count aggregates of one bucket length, updated in O(1) per sample."""
+
+    def __init__(self, name, length, capacity, channels=CHANNELS):
+        self.name = name
+        self.length = length
+        self.channels = tuple(channels)
+        self.store = HistoryStore(aggregate_columns(self.channels), capacity)
+        self.closed_until = -np.inf
+        self.start = None
+        self.minimum = np.full(len(self.channels), np.inf)
+        self.maximum = np.full(len(self.channels), -np.inf)
+        self.total = np.zeros(len(self.channels))
+        self.count = np.zeros(len(self.channels))
+
+    def add(self, timestamp, values):
+        """Folds one sample into the open bucket; returns (start, row) of a bucket it closed, if any."""
+        if timestamp < self.closed_until or (self.start is not None and timestamp < self.start):
+            return None
+        start = bucket_start(timestamp, self.length)
+        closed = None
+        # A start at or before the open one, e.g. after the UTC offset changed, stays in the open bucket
+        if self.start is not None and start > self.start:
+            closed = self.close()
+        if self.start is None:
+            self.start = start
+
+        sample = np.array([values.get(name, np.nan) for name in self.channels], dtype=float)
+        valid = ~np.isnan(sample)
+        np.fmin(self.minimum, sample, out=self.minimum)
+        np.fmax(self.maximum, sample, out=self.maximum)
+        self.total += np.where(valid, sample, 0.0)
+        self.count += valid
+        return closed
+
+    def current(self):
+        """Returns the aggregates of the open bucket as a row dict, or None when it is empty."""
+        if self.start is None:
+            return None
+        filled = self.count > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(filled, self.total / self.count, np.nan)
+        row = {}
+        for i, name in enumerate(self.channels):
+            row[f"{name}_min"] = self.minimum[i] if filled[i] else np.nan
+            row[f"{name}_max"] = self.maximum[i] if filled[i] else np.nan
+            row[f"{name}_mean"] = mean[i]
+            row[f"{name}_count"] = self.count[i]
+        return row
+
+    def close(self):
+        """Moves the open bucket into the store and starts an empty one."""
+        start, row = self.start, self.current()
+        self.store.append(start, row)
+        self.closed_until = bucket_end(start, self.length)
+        self.start = None
+        self.minimum.fill(np.inf)
+        self.maximum.fill(-np.inf)
+        self.total.fill(0.0)
+        self.count.fill(0.0)
+        return start, row
+
+
+class RollupEngine:
+    """
+    Maintains every rollup tier incrementally and persists closed buckets,
+    one `rollup_<tier>` table per tier, next to the raw samples.
+    """
+
+    def __init__(self, channels=CHANNELS, tiers=TIERS, database_path=None):
+        self.channels = tuple(channels)
+        self.tiers = [RollupTier(name, length, capacity, self.channels) for name, length, capacity in tiers]
+        self.databases = {}
+        if database_path is not None:
+            for tier in self.tiers:
+                self.databases[tier.name] = HistoryDatabase(database_path, aggregate_columns(self.channels),
+                                                            batch_size=1, table=f"rollup_{tier.name}")
+
+    def load(self, read_range):
+        """
+        Refills the tiers from disk and rebuilds the open buckets by replaying raw samples
+        through `read_range(start, end)`.
+        """
+        for tier in self.tiers:
+            database = self.databases.get(tier.name)
+            if database is None:
+                continue
+            timestamps, columns = database.recent(tier.store.capacity)
+            tier.store.extend(timestamps, columns)
+            if len(timestamps):
+                # A Python int, sqlite3 cannot bind NumPy integers
+                tier.closed_until = bucket_end(int(timestamps[-1]), tier.length)
+
+        replay_from = min(tier.closed_until for tier in self.tiers)
+        timestamps, columns = read_range(max(replay_from, 0), time.time())
+        for i, timestamp in enumerate(timestamps):
+            self.add(timestamp, {name: values[i] for name, values in columns.items()})
+
+    def add(self, timestamp, values):
+        """Updates every tier with one raw sample."""
+        for tier in self.tiers:
+            closed = tier.add(timestamp, values)
+            if closed is not None and tier.name in self.databases:
+                self.databases[tier.name].append(*closed)
+
+    def tier_for(self, start, end, points):
+        """Returns the coarsest tier that still has `points` buckets between start and end, or None for raw data."""
+        for tier in reversed(self.tiers):
+            if (end - start) / tier.length >= points:
+                return tier
+        return None
+
+    def series(self, tier, channel, start, end):
+        """Returns bucket start times and the mean, min and max of `channel` between start and end."""
+        stored = tier.store.timestamps()
+        database = self.databases.get(tier.name)
+        if database is not None and len(stored) == tier.store.capacity and stored[0] > start:
+            timestamps, columns = database.read_range(start, end)
+        else:
+            first = np.searchsorted(stored, start, side="left")
+            last = np.searchsorted(stored, end, side="right")
+            timestamps = stored[first:last]
+            columns = {f"{channel}_{aggregate}": tier.store.values(f"{channel}_{aggregate}")[first:last]
+                       for aggregate in ("mean", "min", "max")}
+        means, minimums, maximums = (columns[f"{channel}_{aggregate}"] for aggregate in ("mean", "min", "max"))
+
+        row = tier.current()
+        if row is not None and start <= tier.start <= end:
+            timestamps = np.append(timestamps, tier.start)
+            means = np.append(means, row[f"{channel}_mean"])
+            minimums = np.append(minimums, row[f"{channel}_min"])
+            maximums = np.append(maximums, row[f"{channel}_max"])
+        return timestamps, means, minimums, maximums
+
+    def close(self):
+        """Commits and closes the rollup tables."""
+        for database in self.databases.values():
+            database.close()
+        self.databases.clear()
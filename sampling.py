@@ -0,0 +1,96 @@
+import math
+from history import COUNTER_CHANNELS
+
+# channel: (shortest interval s, longest interval s, change since the last logged value that counts as an event)
+SAMPLING_LIMITS = {"room_temp": (30, 600, 0.3),
+                   "outside_temp": (15, 600, 0.3),
+                   "humidity": (30, 600, 2.0),
+                   "pressure": (15, 600, 0.3),
+                   "rain": (5, 600, 0.5),
+                   "rain_transitions": (5, 600, 1)}
+# Longest time between two sensor reads while every channel is flat (seconds)
+WATCH_INTERVAL = 60
+
+
+class AdaptiveSampler:
+    """
+    Decides which snapshots are logged. A snapshot is logged when a channel moved by more than its
+    event threshold since the last logged sample and its shortest interval has passed, or when the
+    longest interval of a channel ran out. `interval` is how often the sensors should be read: the
+    shortest interval of the moving channels during an event, doubling back to `watch_interval`
+    while the readings are flat.
+    """
+
+    def __init__(self, limits=SAMPLING_LIMITS, watch_interval=WATCH_INTERVAL):
+        self.limits = dict(limits)
+        self.fastest = min(lowest for lowest, _, _ in self.limits.values())
+        self.watch_interval = max(watch_interval, self.fastest)
+        self.interval = self.watch_interval
+        self.last_time = None
+        self.last_values = {}
+
+    def due(self, timestamp, values):
+        """Returns whether the sample should be logged, and adapts `interval` to how fast it moves."""
+        elapsed = math.inf if self.last_time is None else timestamp - self.last_time
+        if elapsed <= 0:
+            return False
+        due = False
+        moving = []
+        for channel, (lowest, highest, change) in self.limits.items():
+            # Also reached by channels that failed, so their errors still get logged
+            due = due or elapsed >= highest
+            value = values.get(channel)
+            if value is None or math.isnan(value):
+                continue
+            previous = self.last_values.get(channel)
+            if previous is None or abs(value - previous) >= change:
+                moving.append(lowest)
+                due = due or elapsed >= lowest
+        if moving:
+            self.interval = min(moving)
+        else:
+            self.interval = min(2 * self.interval, self.watch_interval)
+        return due
+
+    def logged(self, timestamp, values):
+        """Makes a logged sample the reference the next changes are measured from."""
+        self.last_time = timestamp
+        for channel in self.limits:
+            value = values.get(channel)
+            if value is not None and not math.isnan(value):
+                self.last_values[channel] = value
+
+
+class CounterIntervals:
+    """
+    Replaces the running totals of counter channels by their increase since the previous logged sample.
+    A total lower than the previous one means the driver restarted, so it is taken whole.
+    Wet seconds become the wet fraction of the interval, which does not depend on the sampling rate.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self.last_time = None
+
+    def values(self, timestamp, values):
+        """Returns a copy of `values` with the counters of the interval ending at `timestamp`."""
+        values = dict(values)
+        for channel in COUNTER_CHANNELS:
+            if channel not in values:
+                continue
+            total = values[channel]
+            previous = self.totals.get(channel)
+            self.totals[channel] = total
+            if previous is not None and total >= previous:
+                values[channel] = total - previous
+        elapsed = timestamp - self.last_time if self.last_time is not None else 0
+        self.last_time = timestamp
+        wet_seconds = values.pop("rain_wet_seconds", None)
+        if wet_seconds is not None:
+            # The first sample has no interval yet, it counts as wet when the plate is wet now
+            fraction = wet_seconds / elapsed if elapsed > 0 else float(values.get("rain", 0))
+            values["rain_wet_fraction"] = min(1.0, max(0.0, fraction))
+            # A shower that started and ended between two samples still marks the interval as rainy
+            if wet_seconds > 0:
+                values["rain"] = 1
+        return values
@@ -0,0 +1,138 @@
+import math
+import time
+import traceback
+from PyQt5.QtCore import QObject, QTimer, Qt
+
+
+class Job:
+    """One periodic job and the statistics of its runs."""
+
+    def __init__(self, name, callback, period, phase=0.0, priority=0, enabled=True):
+        self.name = name
+        self.callback = callback
+        self.period = period
+        self.phase = phase
+        self.priority = priority
+        self.enabled = enabled
+        self.next_run = 0.0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    def next_after(self, now):
+        """First run time after `now` on the job's grid of phase + k * period."""
+        return self.phase + (math.floor((now - self.phase) / self.period) + 1) * self.period
+
+    def summary(self):
+        """Returns the job statistics as a dict, times in milliseconds."""
+        return {"name": self.name,
+                "period": self.period,
+                "priority": self.priority,
+                "enabled": self.enabled,
+                "runs": self.runs,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "mean_ms": 1000 * self.total_time / self.runs if self.runs else 0.0,
+                "max_ms": 1000 * self.max_time,
+                "last_ms": 1000 * self.last_time}
+
+
+class Scheduler(QObject):
+    """
+    Runs every periodic job of the application from a single coarse QTimer.
+    Jobs run on a wall-clock grid (phase + k * period), so jobs with related periods fall on the
+    same instants, and jobs due within `coalesce` seconds of each other share one wakeup, ordered
+    by priority. After a stall each job runs once and skips the runs it missed.
+    """
+
+    def __init__(self, coalesce=0.25):
+        super().__init__()
+        self.coalesce = coalesce
+        self.jobs = {}
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setTimerType(Qt.CoarseTimer)
+        self.timer.timeout.connect(self.run_due)
+        self.wakeups = 0
+
+    def add(self, name, callback, period, phase=0.0, priority=0, enabled=True):
+        """Registers (or replaces) a job running `callback` every `period` seconds."""
+        job = Job(name, callback, period, phase, priority, enabled)
+        job.next_run = job.next_after(time.time())
+        self.jobs[name] = job
+        self.schedule_next()
+        return job
+
+    def remove(self, name):
+        self.jobs.pop(name, None)
+        self.schedule_next()
+
+    def pause(self, *names):
+        for name in names:
+            self.jobs[name].enabled = False
+        self.schedule_next()
+
+    def resume(self, *names):
+        now = time.time()
+        for name in names:
+            job = self.jobs[name]
+            job.enabled = True
+            job.next_run = job.next_after(now)
+        self.schedule_next()
+
+    def set_period(self, name, period):
+        """Changes how often a job runs, moving it onto the grid of the new period."""
+        job = self.jobs[name]
+        if job.period == period:
+            return
+        job.period = period
+        if job.enabled:
+            job.next_run = job.next_after(time.time())
+            self.schedule_next()
+
+    def run_due(self):
+        """Runs every job due now or within the coalescing window, highest priority first."""
+        self.wakeups += 1
+        now = time.time()
+        due = [job for job in self.jobs.values() if job.enabled and job.next_run <= now + self.coalesce]
+        due.sort(key=lambda job: (-job.priority, job.next_run))
+        for job in due:
+            started = time.perf_counter()
+            try:
+                job.callback()
+            except Exception:
+                job.failures += 1
+                traceback.print_exc()
+            elapsed = time.perf_counter() - started
+            job.runs += 1
+            job.total_time += elapsed
+            job.max_time = max(job.max_time, elapsed)
+            job.last_time = elapsed
+
+            next_run = job.next_after(max(time.time(), job.next_run))
+            job.skipped += max(0, round((next_run - job.next_run) / job.period) - 1)
+            job.next_run = next_run
+        self.schedule_next()
+
+    def schedule_next(self):
+        """Arms the timer for the earliest enabled job."""
+        now = time.time()
+        upcoming = []
+        for job in self.jobs.values():
+            if not job.enabled:
+                continue
+            # The wall clock went back (e.g. NTP sync at boot), put the job back on its grid
+            if job.next_run - now > job.period + self.coalesce:
+                job.next_run = job.next_after(now)
+            upcoming.append(job.next_run)
+        if not upcoming:
+            self.timer.stop()
+            return
+        self.timer.start(max(0, int((min(upcoming) - now) * 1000)))
+
+    def summary(self):
+        """Statistics of every job, most expensive first."""
+        return sorted((job.summary() for job in self.jobs.values()), key=lambda row: -row["mean_ms"])
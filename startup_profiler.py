@@ -0,0 +1,79 @@
+import builtins
+import json
+import sys
+import time
+
+PROFILE_PATH = "startup_profile.json"
+
+
+class ImportTimer:
+    """Times the first import of every module by wrapping __import__, nested imports included."""
+
+    def __init__(self):
+        self.timings = {}
+        self.original_import = builtins.__import__
+
+    def install(self):
+        builtins.__import__ = self.timed_import
+
+    def uninstall(self):
+        builtins.__import__ = self.original_import
+
+    def timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self.original_import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        try:
+            return self.original_import(name, globals, locals, fromlist, level)
+        finally:
+            self.timings.setdefault(name, time.perf_counter() - started)
+
+
+class StartupProfiler:
+    """
+    Records milestones from the start of main.py to the first painted frame, together with
+    per-module import times, then prints a report and writes it to `startup_profile.json`.
+    """
+
+    def __init__(self, started):
+        self.started = started
+        self.marks = []
+        self.import_timer = ImportTimer()
+        self.import_timer.install()
+
+    def mark(self, label):
+        self.marks.append((label, time.perf_counter() - self.started))
+
+    def watch_first_paint(self, window, app):
+        """Finishes the profile after `window` has painted for the first time."""
+        from PyQt5.QtCore import QObject, QEvent, QTimer
+
+        profiler = self
+
+        class FirstPaintFilter(QObject):
+            def eventFilter(self, watched, event):
+                if event.type() == QEvent.Paint:
+                    watched.removeEventFilter(self)
+                    # The frame is complete once the paint event has been handled
+                    QTimer.singleShot(0, lambda: profiler.finish(app))
+                return False
+
+        self.paint_filter = FirstPaintFilter()
+        window.installEventFilter(self.paint_filter)
+
+    def finish(self, app):
+        self.mark("first paint")
+        self.import_timer.uninstall()
+        imports = sorted(self.import_timer.timings.items(), key=lambda item: -item[1])
+        report = {"marks_ms": {label: round(1000 * at, 1) for label, at in self.marks},
+                  "imports_ms": {name: round(1000 * spent, 1) for name, spent in imports}}
+
+        print("Startup profile (ms since main.py started):", file=sys.stderr)
+        for label, at in self.marks:
+            print(f"  {label:<28}{1000 * at:9.1f}", file=sys.stderr)
+        print("Slowest imports (ms, nested imports included):", file=sys.stderr)
+        for name, spent in imports[:15]:
+            print(f"  {name:<28}{1000 * spent:9.1f}", file=sys.stderr)
+        with open(PROFILE_PATH, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+        app.quit()
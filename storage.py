@@ -0,0 +1,118 @@
+import math
+import sqlite3
+import time
+import numpy as np
+from history import CHANNELS
+from metrics import shared_metrics
+
+DATABASE_PATH = "meteo_history.db"
+
+
+class HistoryDatabase:
+    """
+    SQLite history of every logged sample, kept in WAL mode and keyed by integer epoch seconds.
+    Samples are buffered and committed in batches; the table is clustered on the timestamp,
+    so loading the recent window and reading time ranges are index range scans.
+    """
+
+    def __init__(self, path=DATABASE_PATH, channels=CHANNELS, batch_size=10, max_delay=600, table="samples"):
+        self.path = path
+        self.table = table
+        self.channels = tuple(channels)
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.pending = []
+        self.last_commit = time.monotonic()
+        self.metrics = shared_metrics()
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(f"CREATE TABLE IF NOT EXISTS {table} "
+                                f"(timestamp INTEGER NOT NULL PRIMARY KEY) WITHOUT ROWID")
+        self.migrate_timestamps()
+        self.ensure_columns()
+
+        columns = ", ".join(("timestamp",) + self.channels)
+        placeholders = ", ".join("?" * (len(self.channels) + 1))
+        self.insert_query = f"INSERT OR REPLACE INTO {table} ({columns}) VALUES ({placeholders})"
+
+    def migrate_timestamps(self):
+        """Rewrites a table from older versions, which keyed samples by REAL timestamps, to integer seconds."""
+        types = {row[1]: row[2] for row in self.connection.execute(f"PRAGMA table_info({self.table})")}
+        if types["timestamp"].upper() == "INTEGER":
+            return
+        others = [name for name in types if name != "timestamp"]
+        definitions = "".join(f", {name} REAL" for name in others)
+        selected = "".join(f", {name}" for name in others)
+        try:
+            self.connection.executescript(
+                f"BEGIN;"
+                f"CREATE TABLE {self.table}_migrated (timestamp INTEGER NOT NULL PRIMARY KEY{definitions}) WITHOUT ROWID;"
+                f"INSERT OR REPLACE INTO {self.table}_migrated (timestamp{selected}) "
+                f"SELECT CAST(timestamp AS INTEGER){selected} FROM {self.table} ORDER BY timestamp;"
+                f"DROP TABLE {self.table};"
+                f"ALTER TABLE {self.table}_migrated RENAME TO {self.table};"
+                f"COMMIT;")
+        except sqlite3.Error:
+            self.connection.rollback()
+            raise
+
+    def ensure_columns(self):
+        """Adds a column for every channel the table does not know about yet."""
+        existing = {row[1] for row in self.connection.execute(f"PRAGMA table_info({self.table})")}
+        for name in self.channels:
+            if name not in existing:
+                self.connection.execute(f"ALTER TABLE {self.table} ADD COLUMN {name} REAL")
+        self.connection.commit()
+
+    def append(self, timestamp, values):
+        """Queues one sample and commits the batch once it is full or old enough."""
+        self.pending.append((int(timestamp),) + tuple(values.get(name) for name in self.channels))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_commit >= self.max_delay:
+            self.flush()
+
+    def flush(self):
+        """Writes every queued sample in a single transaction."""
+        if self.pending:
+            with self.metrics.timer("meteo_storage_write_seconds", failures="meteo_storage_write_failures_total",
+                                    table=self.table):
+                with self.connection:
+                    self.connection.executemany(self.insert_query, self.pending)
+            self.metrics.increment("meteo_storage_rows_written_total", len(self.pending), table=self.table)
+            self.pending.clear()
+        self.last_commit = time.monotonic()
+
+    def columns_from_rows(self, rows):
+        """Turns (timestamp, *channels) rows into a timestamp array and per-channel arrays."""
+        table = np.array(rows, dtype=float).reshape(-1, len(self.channels) + 1)
+        return table[:, 0].astype(np.int64), {name: table[:, i + 1] for i, name in enumerate(self.channels)}
+
+    def recent(self, count):
+        """Returns the newest `count` samples, oldest first."""
+        self.flush()
+        columns = ", ".join(("timestamp",) + self.channels)
+        rows = self.connection.execute(f"SELECT {columns} FROM {self.table} ORDER BY timestamp DESC LIMIT ?",
+                                       (int(count),)).fetchall()
+        rows.reverse()
+        return self.columns_from_rows(rows)
+
+    def read_range(self, start, end, limit=None):
+        """Returns every sample with start <= timestamp <= end, or the oldest `limit` of them, oldest first."""
+        self.flush()
+        columns = ", ".join(("timestamp",) + self.channels)
+        # Whole seconds as Python ints, sqlite3 binds NumPy integers as blobs that match no row
+        rows = self.connection.execute(f"SELECT {columns} FROM {self.table} WHERE timestamp BETWEEN ? AND ? "
+                                       f"ORDER BY timestamp LIMIT ?",
+                                       (math.ceil(start), math.floor(end), -1 if limit is None else int(limit))
+                                       ).fetchall()
+        return self.columns_from_rows(rows)
+
+    def first_timestamp(self):
+        """Returns the oldest committed timestamp, or None for an empty table."""
+        return self.connection.execute(f"SELECT MIN(timestamp) FROM {self.table}").fetchone()[0]
+
+    def close(self):
+        """Commits outstanding samples and closes the database."""
+        self.flush()
+        self.connection.close()
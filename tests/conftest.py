@@ -0,0 +1,24 @@
+import os
+import sys
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from backend import Backend
+from drivers import create_drivers
+
+
+@pytest.fixture(scope="session")
+def qt_app():
+    """One Qt application for the whole run; Qt aborts when it is destroyed under running threads."""
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+@pytest.fixture
+def backend(qt_app, tmp_path):
+    """A Backend on simulated sensors, logging to a database of its own."""
+    backend = Backend(database_path=str(tmp_path / "history.db"), drivers=create_drivers(True))
+    yield backend
+    backend.close()
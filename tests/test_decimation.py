@@ -0,0 +1,21 @@
+import numpy as np
+from decimation import DecimationCache
+
+
+def test_open_rollup_bucket_is_read_again():
+    # Hourly buckets stamped with their start; the one at 18000 is still open
+    buckets = {14400: 1.0, 18000: 2.0}
+
+    def load(start, end, points):
+        times = np.array([t for t in sorted(buckets) if start <= t <= end], dtype=float)
+        means = np.array([buckets[t] for t in times])
+        return times, means, means, means
+
+    cache = DecimationCache(load)
+    # 64 s bins, far finer than the buckets
+    x, y, _ = cache.curve(0, 20000, 313, newest=18500)
+    assert y.tolist() == [1.0, 2.0]
+    buckets[18000] = 3.0
+    x, y, _ = cache.curve(0, 20000, 313, newest=19500)
+    assert x.tolist() == [14400, 18000]
+    assert y.tolist() == [1.0, 3.0]
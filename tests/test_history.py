@@ -0,0 +1,35 @@
+import pytest
+from history import SharedHistoryStore
+
+
+@pytest.fixture
+def rings(tmp_path):
+    path = str(tmp_path / "ring")
+    writer = SharedHistoryStore(path, ("a", "b"), capacity=4, create=True)
+    reader = SharedHistoryStore(path, ("a", "b"), capacity=4)
+    return writer, reader
+
+
+def test_copy_range_is_not_changed_by_later_appends(rings):
+    writer, reader = rings
+    for timestamp in range(4):
+        writer.append(timestamp, {"a": timestamp, "b": -timestamp})
+    times, columns = reader.copy_range(0, 3)
+    writer.append(4, {"a": 4, "b": -4})
+    assert times.tolist() == [0, 1, 2, 3]
+    assert columns["a"].tolist() == [0, 1, 2, 3]
+    assert columns["b"].tolist() == [0, -1, -2, -3]
+    # The oldest sample is gone, so the ring cannot answer from 0 any more
+    assert reader.copy_range(0, 4) is None
+    assert reader.copy_range(2, 4)[0].tolist() == [2, 3, 4]
+
+
+def test_read_gives_up_when_a_write_never_ends(rings):
+    writer, reader = rings
+    writer.append(0, {"a": 1.0, "b": 2.0})
+    # A writer that died between the two generation bumps
+    writer._header[writer.GENERATION] += 1
+    with pytest.raises(TimeoutError):
+        reader.copy_range(0, 1)
+    with pytest.raises(TimeoutError):
+        reader.latest()
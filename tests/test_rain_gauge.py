@@ -0,0 +1,78 @@
+import pytest
+from drivers import YL83Driver
+from rain_gauge import MockGPIO
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def rain():
+    """A YL-83 driver on a mock pin with a 2 s debounce and a hand-driven clock."""
+    clock = Clock()
+    gpio = MockGPIO()
+    driver = YL83Driver(pin=8, gpio=gpio, debounce=2.0, clock=clock)
+    driver.open()
+
+    def level(at, wet):
+        clock.now = at
+        gpio.set_input(8, MockGPIO.LOW if wet else MockGPIO.HIGH)
+
+    def read(at):
+        clock.now = at
+        return driver.read()
+
+    yield level, read
+    driver.close()
+
+
+def test_bounce_shorter_than_debounce_is_ignored(rain):
+    level, read = rain
+    level(10.0, True)
+    level(10.5, False)
+    level(11.0, True)
+    level(11.2, False)
+    assert read(20.0) == {"rain": 0, "rain_transitions": 0, "rain_wet_seconds": 0.0}
+
+
+def test_shower_between_reads_is_counted(rain):
+    level, read = rain
+    assert read(0.0)["rain"] == 0
+    level(30.0, True)
+    level(90.0, False)
+    values = read(180.0)
+    assert values["rain"] == 0
+    assert values["rain_transitions"] == 2
+    assert values["rain_wet_seconds"] == 60.0
+
+
+def test_wet_seconds_add_up(rain):
+    level, read = rain
+    # Wet from 10.2 after a bounce, dry from 21 after another one
+    level(10.0, True)
+    level(10.1, False)
+    level(10.2, True)
+    assert read(15.0) == {"rain": 1, "rain_transitions": 1, "rain_wet_seconds": 4.8}
+    level(20.0, False)
+    level(20.5, True)
+    level(21.0, False)
+    level(40.0, True)
+    level(50.0, False)
+    values = read(60.0)
+    assert values["rain_transitions"] == 4
+    assert values["rain_wet_seconds"] == pytest.approx(10.8 + 10.0)
+
+
+
+def test_close_removes_edge_detection():
+    gpio = MockGPIO()
+    driver = YL83Driver(pin=8, gpio=gpio)
+    driver.open()
+    assert 8 in gpio.callbacks
+    driver.close()
+    assert gpio.callbacks == {}
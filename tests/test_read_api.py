@@ -0,0 +1,90 @@
+import http.client
+import json
+import threading
+import time
+import pytest
+from PyQt5.QtCore import QCoreApplication
+from acquisition import SensorSnapshot
+from drivers import SimulatedWeather
+import read_api
+from read_api import ReadApi
+
+
+@pytest.fixture
+def api(backend):
+    weather = SimulatedWeather()
+    now = int(time.time())
+    for timestamp in range(now - 3600, now, 180):
+        backend.log_snapshot(SensorSnapshot(timestamp, weather.sample(timestamp), {}))
+    # Only the samples logged by the tests change the history: the first reading lands, then logging stops
+    backend.scheduler.pause("logging")
+    deadline = time.monotonic() + 10
+    while backend.snapshot is None and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+    api = ReadApi(backend, port=0)
+    api.start()
+    yield api
+    api.close()
+
+
+def get(api, path, etag=None):
+    """GETs `path` on localhost, spinning the Qt loop that answers the queries; returns (status, ETag, body)."""
+    answers = []
+
+    def client():
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", api.port, timeout=10)
+            connection.request("GET", path, headers={"If-None-Match": etag} if etag else {})
+            response = connection.getresponse()
+            answers.append((response.status, response.headers["ETag"], response.read()))
+            connection.close()
+        finally:
+            answers.append(None)
+
+    thread = threading.Thread(target=client)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while None not in answers and time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+        time.sleep(0.005)
+    thread.join()
+    return answers[0]
+
+
+@pytest.mark.parametrize("path", ["/api/history", "/api/history?channels=pressure&start=0",
+                                  "/api/rollups?tier=1h&channel=pressure"])
+def test_open_ended_polls_are_not_modified(api, path):
+    status, etag, _ = get(api, path)
+    assert status == 200
+    # The clock moves on between two polls of a dashboard
+    time.sleep(0.05)
+    assert get(api, path, etag) == (304, etag, b"")
+
+
+def test_new_sample_changes_the_tag(api):
+    _, etag, _ = get(api, "/api/history")
+    timestamp = int(time.time())
+    api.backend.log_snapshot(SensorSnapshot(timestamp, SimulatedWeather().sample(timestamp), {}))
+    status, new_etag, _ = get(api, "/api/history", etag)
+    assert status == 200
+    assert new_etag != etag
+
+
+def test_history_is_read_a_chunk_at_a_time(api, monkeypatch):
+    monkeypatch.setattr(read_api, "CHUNK_ROWS", 7)
+    reads = []
+    read_range = api.backend.read_range
+    monkeypatch.setattr(api.backend, "read_range", lambda *args: reads.append(args) or read_range(*args))
+    status, _, body = get(api, "/api/history?channels=pressure&start=0")
+    times = [row[0] for row in json.loads(body)["rows"]]
+    assert status == 200
+    assert times == api.backend.history.timestamps().tolist()
+    assert len(reads) == len(times) // 7 + 1
+    assert all(limit == 7 for _, _, limit in reads)
+
+
+@pytest.mark.parametrize("query", ["start=nan", "end=inf", "start=-inf&end=0", "start=1&end=nan"])
+def test_non_finite_bounds_are_rejected(api, query):
+    assert get(api, f"/api/history?{query}")[0] == 400
+    assert get(api, f"/api/rollups?tier=1h&channel=pressure&{query}")[0] == 400
@@ -0,0 +1,79 @@
+import time
+import numpy as np
+import pytest
+from drivers import SimulatedWeather
+from history import CHANNELS
+from rollup import RollupEngine
+from storage import HistoryDatabase
+
+
+def logging_weeks(path, weeks=3, period=180):
+    """Logs `weeks` of simulated samples up to now into the raw table and the rollups, as Backend does."""
+    weather = SimulatedWeather()
+    database = HistoryDatabase(path, CHANNELS)
+    rollups = RollupEngine(CHANNELS, database_path=path)
+    rollups.load(database.read_range)
+    end = int(time.time())
+    for timestamp in range(end - weeks * 7 * 86400, end, period):
+        values = weather.sample(timestamp)
+        database.append(timestamp, values)
+        rollups.add(timestamp, values)
+    return database, rollups
+
+
+def test_restart_rebuilds_open_buckets(tmp_path):
+    path = str(tmp_path / "history.db")
+    database, rollups = logging_weeks(path)
+    before = {tier.name: tier.current()["pressure_count"] for tier in rollups.tiers}
+    series_before = {tier.name: len(rollups.series(tier, "pressure", 0, time.time())[0]) for tier in rollups.tiers}
+    rollups.close()
+    database.close()
+
+    database = HistoryDatabase(path, CHANNELS)
+    reopened = RollupEngine(CHANNELS, database_path=path)
+    reopened.load(database.read_range)
+    assert all(count > 0 for count in before.values())
+    assert {tier.name: tier.current()["pressure_count"] for tier in reopened.tiers} == before
+    assert {tier.name: len(reopened.series(tier, "pressure", 0, time.time())[0])
+            for tier in reopened.tiers} == series_before
+    reopened.close()
+    database.close()
+
+
+def test_read_range_accepts_numpy_bounds(tmp_path):
+    database = HistoryDatabase(str(tmp_path / "history.db"), CHANNELS)
+    for timestamp in range(1000, 2000, 100):
+        database.append(timestamp, {"pressure": 1000.0})
+    times, columns = database.read_range(np.int64(1200), np.float64(1500.5))
+    assert times.tolist() == [1200, 1300, 1400, 1500]
+    database.close()
+
+
+@pytest.fixture
+def warsaw(monkeypatch):
+    monkeypatch.setenv("TZ", "Europe/Warsaw")
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+@pytest.mark.parametrize("first_day, short_day, hours", [((2026, 3, 26), 3, 23), ((2026, 10, 22), 3, 25)])
+def test_days_follow_the_calendar_across_dst(warsaw, first_day, short_day, hours):
+    engine = RollupEngine(("pressure",))
+    start = int(time.mktime(first_day + (0, 0, 0, 0, 0, -1)))
+    end = int(time.mktime((first_day[0], first_day[1], first_day[2] + 6, 0, 0, 0, 0, 0, -1)))
+    for timestamp in range(start, end + 1, 600):
+        engine.add(timestamp, {"pressure": 1000.0})
+    tiers = {tier.name: tier for tier in engine.tiers}
+    days = tiers["1d"].store
+    starts = days.timestamps()
+    assert [time.localtime(day)[3:6] for day in starts] == [(0, 0, 0)] * 6
+    # The day of the change holds an hour of samples more or less than the others
+    expected = [144] * 6
+    expected[short_day] = hours * 6
+    assert days.values("pressure_count").tolist() == expected
+    assert np.all(np.diff(tiers["1h"].store.timestamps()) == 3600)
+    # Every sample of the week up to the open bucket is in a closed weekly or daily bucket
+    assert tiers["1w"].current()["pressure_count"] + sum(tiers["1w"].store.values("pressure_count")) \
+        == (end - start) // 600 + 1
@@ -0,0 +1,39 @@
+import pytest
+from sampling import CounterIntervals
+
+
+def totals(wet, transitions, wet_seconds):
+    return {"rain": wet, "rain_transitions": transitions, "rain_wet_seconds": wet_seconds}
+
+
+def test_wet_fraction_does_not_depend_on_the_interval():
+    counters = CounterIntervals()
+    counters.values(1000, totals(1, 1, 0.0))
+    # Raining throughout, logged once after 10 s and once after 600 s
+    assert counters.values(1010, totals(1, 1, 10.0))["rain_wet_fraction"] == 1.0
+    assert counters.values(1610, totals(1, 1, 610.0))["rain_wet_fraction"] == 1.0
+    # Wet for a quarter of the next interval
+    values = counters.values(1810, totals(0, 2, 660.0))
+    assert values["rain_wet_fraction"] == pytest.approx(0.25)
+    assert values["rain_transitions"] == 1
+    assert "rain_wet_seconds" not in values
+
+
+def test_short_shower_marks_the_interval_rainy():
+    counters = CounterIntervals()
+    counters.values(0, totals(0, 0, 0.0))
+    values = counters.values(300, totals(0, 2, 30.0))
+    assert values["rain"] == 1
+    assert values["rain_wet_fraction"] == pytest.approx(0.1)
+
+
+def test_first_sample_takes_the_current_state():
+    assert CounterIntervals().values(0, totals(1, 1, 5.0))["rain_wet_fraction"] == 1.0
+
+
+def test_driver_restart_takes_the_total_whole():
+    counters = CounterIntervals()
+    counters.values(0, totals(0, 10, 100.0))
+    values = counters.values(100, totals(1, 1, 20.0))
+    assert values["rain_transitions"] == 1
+    assert values["rain_wet_fraction"] == pytest.approx(0.2)
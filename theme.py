@@ -0,0 +1,59 @@
+from PyQt5.QtGui import QColor, QPalette, QPen
+
+STYLESHEET = """
+    QWidget {{ background-color: {background}; color: {text}; }}
+    QPushButton {{ background-color: {button}; color: {text}; font-size: 35px; font-weight: bold; }}
+    QLabel {{ color: {label}; font-size: 25px; font-weight: bold; }}
+"""
+
+THEME_COLORS = {"dark": {"background": "#2C2F33", "text": "white", "button": "#293442", "label": "#BDC3C7",
+                         "axis_color": "white", "labels_color": "white"},
+                "light": {"background": "#b7b6ba", "text": "black", "button": "#E0E0E0", "label": "black",
+                          "axis_color": "black", "labels_color": "black"}}
+
+
+class Theme:
+    """
+    One light/dark look of the application, built once: the application palette and stylesheet,
+    plus the pens and label style of the plot axes, so reading the current theme costs nothing.
+    """
+
+    def __init__(self, name, background, text, button, label, axis_color, labels_color):
+        self.name = name
+        self.axis_color = axis_color
+        self.labels_color = labels_color
+        self.stylesheet = STYLESHEET.format(background=background, text=text, button=button, label=label)
+
+        self.palette = QPalette()
+        for role, color in ((QPalette.Window, background), (QPalette.Base, background),
+                            (QPalette.WindowText, text), (QPalette.Text, text),
+                            (QPalette.Button, button), (QPalette.ButtonText, text)):
+            self.palette.setColor(role, QColor(color))
+
+        self.axis_pen = QPen(QColor(axis_color))
+        self.axis_pen.setWidth(2)
+        self.axis_pen.setCosmetic(True)
+        self.text_pen = QPen(QColor(labels_color))
+        self.text_pen.setCosmetic(True)
+        self.axis_label_style = {"font-size": "25px", "font-weight": "bold", "color": labels_color}
+
+    def apply(self, app):
+        """Restyles the application unless this theme is already applied."""
+        if app.property("theme") == self.name:
+            return False
+        app.setPalette(self.palette)
+        app.setStyleSheet(self.stylesheet)
+        app.setProperty("theme", self.name)
+        return True
+
+
+_themes = {}
+
+
+def theme_for(dark_mode):
+    """Returns the dark or light theme, building it on first use."""
+    name = "dark" if dark_mode else "light"
+    theme = _themes.get(name)
+    if theme is None:
+        theme = _themes[name] = Theme(name, **THEME_COLORS[name])
+    return theme
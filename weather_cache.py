@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+WEATHER_CACHE_PATH = "weather_cache.json"
+
+
+class ResponseCache:
+    """
+    City-keyed cache of weather responses.
+    Entries younger than `ttl` are fresh; up to `stale_ttl` they are still served while a
+    refresh runs in the background; older entries are treated as missing.
+    """
+
+    def __init__(self, ttl=600, stale_ttl=3600, path=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.path = path
+        self.entries = {}
+        self.city_ids = {}
+        self.lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def key(city_name):
+        return city_name.casefold()
+
+    def get(self, city_name):
+        """Returns (data, "fresh" | "stale") or (None, None)."""
+        with self.lock:
+            entry = self.entries.get(self.key(city_name))
+        if entry is None:
+            return None, None
+        age = time.time() - entry[0]
+        if age < self.ttl:
+            return entry[1], "fresh"
+        if age < self.stale_ttl:
+            return entry[1], "stale"
+        return None, None
+
+    def put(self, city_name, data, fetched_at=None):
+        with self.lock:
+            self.entries[self.key(city_name)] = (fetched_at or time.time(), data)
+            if "id" in data:
+                self.city_ids[self.key(city_name)] = data["id"]
+
+    def city_id(self, city_name):
+        """Returns the OpenWeatherMap id learned from an earlier response, or None."""
+        with self.lock:
+            return self.city_ids.get(self.key(city_name))
+
+    def load(self):
+        """Reads the persisted entries, ignoring a missing or damaged file."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                stored = json.load(file)
+            with self.lock:
+                self.entries.update({key: (entry[0], entry[1]) for key, entry in stored["entries"].items()})
+                self.city_ids.update(stored["city_ids"])
+        except (OSError, ValueError, TypeError, IndexError, KeyError):
+            pass
+
+    def save(self):
+        """Writes entries that are still servable to the persistence file."""
+        if self.path is None:
+            return
+        now = time.time()
+        with self.lock:
+            stored = {"entries": {key: entry for key, entry in self.entries.items() if now - entry[0] < self.stale_ttl},
+                      "city_ids": dict(self.city_ids)}
+        temporary = self.path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(stored, file)
+        os.replace(temporary, self.path)
+
+
+class IconCache:
+    """Least-recently-used cache of weather icon PNGs; icons never expire."""
+
+    def __init__(self, max_size=64):
+        self.max_size = max_size
+        self.icons = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, icon):
+        with self.lock:
+            content = self.icons.get(icon)
+            if content is not None:
+                self.icons.move_to_end(icon)
+            return content
+
+    def put(self, icon, content):
+        with self.lock:
+            self.icons[icon] = content
+            self.icons.move_to_end(icon)
+            while len(self.icons) > self.max_size:
+                self.icons.popitem(last=False)
+
+
+class SingleFlight:
+    """Tracks running requests so identical ones are merged into the first."""
+
+    def __init__(self):
+        self.running = set()
+        self.lock = threading.Lock()
+
+    def begin(self, key):
+        """Returns True when the caller should perform the request for `key`."""
+        with self.lock:
+            if key in self.running:
+                return False
+            self.running.add(key)
+            return True
+
+    def end(self, key):
+        with self.lock:
+            self.running.discard(key)
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every OpenWeatherMap request.
+    Interactive requests are only recorded, background work waits for a token.
+    """
+
+    def __init__(self, per_minute=50):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def record(self):
+        """Counts a request that was sent without waiting."""
+        with self.lock:
+            self.refill()
+            self.tokens -= 1.0
+
+    def acquire(self, stop=None):
+        """Blocks until a token is available; returns False when `stop` is set first."""
+        while True:
+            with self.lock:
+                self.refill()
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return True
+                wait = (1.0 - self.tokens) / self.rate
+            if stop is None:
+                time.sleep(wait)
+            elif stop.wait(wait):
+                return False
@@ -0,0 +1,170 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from PyQt5.QtCore import QObject, QCoreApplication, pyqtSignal
+from weather_cache import ResponseCache, IconCache, SingleFlight, RateLimiter, WEATHER_CACHE_PATH
+from metrics import shared_metrics
+
+API_URL = "https://api.openweathermap.org/data/2.5/weather"
+GROUP_URL = "https://api.openweathermap.org/data/2.5/group"
+ICON_URL = "https://openweathermap.org/img/wn/{icon}@2x.png"
+# (connect, read) timeouts in seconds
+TIMEOUT = (3.05, 10)
+
+HTTP_ERRORS = {401: "Unauthorized",
+               403: "Acces is denied",
+               500: "Internal server Error",
+               502: "Bad Gateway",
+               503: "Server is down"}
+
+
+class WeatherClient(QObject):
+    """
+    OpenWeatherMap client running its requests on a small thread pool over one keep-alive session.
+    Results are delivered through signals, which Qt queues to the thread of the receiving widget.
+    Responses are cached per city, icons per icon code, and identical running requests are merged.
+    """
+    weather_ready = pyqtSignal(str, object)
+    icon_ready = pyqtSignal(str, bytes)  # icon code, PNG
+    error = pyqtSignal(str, str)
+
+    def __init__(self, keys_file="keys.env", max_workers=4, cache_ttl=600, cache_path=WEATHER_CACHE_PATH,
+                 requests_per_minute=50):
+        super().__init__()
+        load_dotenv(keys_file)
+        self.api_key = os.getenv("API_KEY")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="weather")
+        self.cache = ResponseCache(ttl=cache_ttl, path=cache_path)
+        self.icons = IconCache()
+        self.in_flight = SingleFlight()
+        self.rate_limit = RateLimiter(requests_per_minute)
+        self.metrics = shared_metrics()
+
+    def fetch(self, city_name):
+        """
+        Delivers cached weather of `city_name` at once and downloads it in the background
+        when it is missing or stale.
+        """
+        data, state = self.cache.get(city_name)
+        if data is not None:
+            self.weather_ready.emit(city_name, data)
+            self.deliver_icon(data)
+        if state != "fresh":
+            self.refresh(city_name, quiet=data is not None)
+
+    def refresh(self, city_name, quiet=False):
+        """Starts a download unless the same city is already being downloaded."""
+        key = ("weather", ResponseCache.key(city_name))
+        if self.in_flight.begin(key):
+            self.executor.submit(self.fetch_weather, city_name, key, quiet)
+
+    def deliver_icon(self, data):
+        """Emits the icon of a response from the icon cache, downloading it once if needed."""
+        icon = str(data["weather"][0]["icon"])
+        content = self.icons.get(icon)
+        if content is not None:
+            self.icon_ready.emit(icon, content)
+        else:
+            self.warm_icon(icon)
+
+    def warm_icon(self, icon):
+        """Downloads an icon into the cache unless it is cached or already being downloaded."""
+        if self.icons.get(icon) is None and self.in_flight.begin(("icon", icon)):
+            self.executor.submit(self.fetch_icon, icon)
+
+    def fetch_weather(self, city_name, key, quiet=False, reserved=False):
+        """
+        Downloads weather data; errors are reported unless stale data is already on screen.
+        `reserved` means the caller already took a rate limiter token for this request.
+        """
+        try:
+            data = self.download_weather(city_name, reserved)
+            if data.get("cod") == 200:
+                self.cache.put(city_name, data)
+        except requests.exceptions.RequestException as e:
+            if not quiet:
+                self.error.emit(city_name, self.describe_error(e))
+            return
+        finally:
+            self.in_flight.end(key)
+
+        if data.get("cod") != 200:
+            return
+        # The labels are filled in right away, the icon follows from the cache or another pool thread
+        self.weather_ready.emit(city_name, data)
+        self.deliver_icon(data)
+
+    def download_weather(self, city_name, reserved=False):
+        if not reserved:
+            self.rate_limit.record()
+        with self.timed_request("weather"):
+            response = self.session.get(API_URL, params={"q": city_name, "appid": self.api_key}, timeout=TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+
+    def download_group(self, city_ids):
+        """Downloads up to 20 cities in one request and returns their responses."""
+        with self.timed_request("group"):
+            response = self.session.get(GROUP_URL, params={"id": ",".join(map(str, city_ids)), "appid": self.api_key},
+                                        timeout=TIMEOUT)
+            response.raise_for_status()
+            return response.json()["list"]
+
+    def timed_request(self, endpoint):
+        """Records the latency and failures of one OpenWeatherMap request."""
+        return self.metrics.timer("meteo_http_request_seconds", failures="meteo_http_request_failures_total",
+                                  endpoint=endpoint)
+
+    @staticmethod
+    def describe_error(error):
+        """Turns a requests exception into the message shown under the city list."""
+        if isinstance(error, requests.exceptions.HTTPError):
+            return HTTP_ERRORS.get(error.response.status_code, "HTTP error")
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return "No internter connection "
+        if isinstance(error, requests.exceptions.Timeout):
+            return "Timeout Error"
+        if isinstance(error, requests.exceptions.TooManyRedirects):
+            return "Too many redirects"
+        return "Request Error"
+
+    def fetch_icon(self, icon):
+        """Downloads a weather icon; a failed icon download leaves the previous icon in place."""
+        try:
+            with self.timed_request("icon"):
+                response = self.session.get(ICON_URL.format(icon=icon), timeout=TIMEOUT)
+                response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return
+        finally:
+            self.in_flight.end(("icon", icon))
+        self.icons.put(icon, response.content)
+        self.icon_ready.emit(icon, response.content)
+
+    def close(self):
+        """Drops queued requests, closes the pooled connections and persists the response cache."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        try:
+            self.cache.save()
+        except OSError:
+            pass
+
+
+_shared_client = None
+
+
+def shared_client():
+    """Returns the client shared by every World Weather window, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = WeatherClient()
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(_shared_client.close)
+    return _shared_client
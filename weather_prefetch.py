@@ -0,0 +1,83 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from PyQt5.QtCore import QObject, QTimer
+from weather_cache import ResponseCache
+
+# Largest number of city ids the group endpoint accepts in one request
+GROUP_SIZE = 20
+
+
+class WeatherPrefetcher(QObject):
+    """
+    Keeps the response cache warm for every listed city, so picking a city shows its weather at once.
+    Once per cache TTL a background thread refreshes the cities that are no longer fresh: cities
+    whose id is known from an earlier answer go through the group endpoint, 20 per request,
+    the rest through a small pool. Every request waits for the client's rate limiter.
+    """
+
+    def __init__(self, client, cities, interval=None, concurrency=3):
+        super().__init__()
+        self.client = client
+        self.cities = list(dict.fromkeys(cities))
+        self.interval = interval or client.cache.ttl
+        self.concurrency = concurrency
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.scheduler = None
+
+    def start(self, scheduler, delay=10):
+        """Runs the first refresh after `delay` seconds and then once per interval."""
+        self.scheduler = scheduler
+        scheduler.add("weather prefetch", self.run, self.interval)
+        QTimer.singleShot(int(delay * 1000), self.run)
+
+    def stop(self):
+        if self.scheduler is not None:
+            self.scheduler.remove("weather prefetch")
+        self.stop_event.set()
+
+    def run(self):
+        """Starts a refresh unless the previous one is still running."""
+        if self.stop_event.is_set() or (self.thread is not None and self.thread.is_alive()):
+            return
+        self.thread = threading.Thread(target=self.prefetch, name="weather-prefetch", daemon=True)
+        self.thread.start()
+
+    def prefetch(self):
+        due = [city for city in self.cities if self.client.cache.get(city)[1] != "fresh"]
+        by_id = {}
+        singles = []
+        for city in due:
+            city_id = self.client.cache.city_id(city)
+            if city_id is None:
+                singles.append(city)
+            else:
+                by_id[city_id] = city
+
+        ids = list(by_id)
+        for first in range(0, len(ids), GROUP_SIZE):
+            batch = ids[first:first + GROUP_SIZE]
+            if not self.client.rate_limit.acquire(self.stop_event):
+                return
+            try:
+                answers = self.client.download_group(batch)
+            except (requests.exceptions.RequestException, KeyError):
+                # The cities of a failed group request are retried one by one
+                self.client.metrics.increment("meteo_http_retries_total", len(batch), endpoint="group")
+                singles.extend(by_id[city_id] for city_id in batch)
+                continue
+            for data in answers:
+                city = by_id.get(data.get("id"))
+                if city is not None:
+                    data.setdefault("cod", 200)
+                    self.client.cache.put(city, data)
+                    self.client.warm_icon(str(data["weather"][0]["icon"]))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="weather-prefetch") as pool:
+            for city in singles:
+                if not self.client.rate_limit.acquire(self.stop_event):
+                    return
+                key = ("weather", ResponseCache.key(city))
+                if self.client.in_flight.begin(key):
+                    pool.submit(self.client.fetch_weather, city, key, True, True)
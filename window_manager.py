@@ -0,0 +1,32 @@
+class WindowManager:
+    """
+    Builds every full-screen window on first use and reuses it on later opens.
+    Windows stop their own timers in hideEvent and restart them in showEvent,
+    so hidden screens cost nothing while they wait to be shown again.
+    """
+
+    def __init__(self, width=1024, height=600):
+        self.width = width
+        self.height = height
+        self.factories = {}
+        self.windows = {}
+
+    def register(self, name, factory):
+        """Declares how to build the window called `name`; nothing is built yet."""
+        self.factories[name] = factory
+
+    def show(self, name):
+        """Shows the window called `name`, building it the first time it is needed."""
+        window = self.windows.get(name)
+        if window is None:
+            window = self.factories[name]()
+            self.windows[name] = window
+        window.showFullScreen()
+        window.resize(self.width, self.height)
+        return window
+
+    def apply_theme(self, theme):
+        """Passes a light/dark mode change on to the windows built so far; later ones start with it."""
+        for window in self.windows.values():
+            if hasattr(window, "apply_theme"):
+                window.apply_theme(theme)
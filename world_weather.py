@@ -1,38 +1,20 @@
-import requests
 from PyQt5.QtWidgets import (QLabel, QPushButton, QWidget, QHBoxLayout,
                              QVBoxLayout, QSizePolicy, QGridLayout, QComboBox )
-from PyQt5.QtGui import QIcon, QPixmap
 from PyQt5.QtCore import Qt, QSize
-from dotenv import load_dotenv
-import os
+from weather_client import shared_client
+from cities import WORLD_CAPITALS, POLAND_CITIES
+from pixmap_cache import shared_pixmap_cache
 
 class WorldWeather(QWidget):
-    def __init__(self):
+    def __init__(self, client=None):
         super().__init__()
+        self.client = client or shared_client()
+        self.requested_city = None
+        self.requested_icon = None
+        self.pixmaps = shared_pixmap_cache()
 
-        # Some Well-Known Capitals Around the World
-        self.world_capitals = [
-            "Abu Dhabi", "Amman", "Amsterdam", "Ankara", "Athens", "Baghdad", "Bangkok", "Beijing", "Belgrade",
-            "Berlin", "Bogota", "Brasilia", "Brussels", "Bucharest", "Budapest", "Buenos Aires", "Cairo",
-            "Canberra", "Caracas", "Copenhagen", "Doha", "Dublin", "Hanoi", "Helsinki", "Istanbul",
-            "Jakarta", "Kabul", "Kuala Lumpur", "Lisbon", "London", "Madrid", "Manila", "Mexico City",
-            "Moscow", "New Delhi", "Oslo", "Ottawa", "Paris", "Prague", "Reykjavik", "Riyadh", "Rome",
-            "Santiago", "Seoul", "Singapore", "Sofia", "Stockholm", "Tehran", "Tokyo", "Vienna", "Warsaw",
-            "Washington", "Zagreb"
-        ]
-
-
-        self.poland_cities = [
-            "Warszawa", "Kraków", "Łódź", "Wrocław", "Poznań", "Gdańsk", "Szczecin",
-            "Bydgoszcz", "Lublin", "Katowice", "Białystok", "Gdynia", "Częstochowa",
-            "Radom", "Sosnowiec", "Toruń", "Kielce", "Gliwice", "Zabrze", "Olsztyn",
-            "Rzeszów", "Zielona Góra", "Bytom", "Nowy Sącz", "Wałbrzych", "Opole",
-            "Płock", "Elbląg", "Gorzów Wielkopolski", "Dąbrowa Górnicza", "Tarnów",
-            "Kalisz", "Legnica", "Świdnica", "Mielec", "Przemyśl", "Stalowa Wola",
-            "Lubin", "Tychy", "Chorzów", "Ruda Śląska", "Siedlce", "Włocławek",
-            "Ciechanów", "Kołobrzeg", "Lubliniec", "Zamość", "Żory", "Piotrków Trybunalski",
-            "Kędzierzyn-Koźle", "Suwalki", "Świnoujście", "Krosno", "Kutno", "Kielce", "Głogów"
-        ]
+        self.world_capitals = WORLD_CAPITALS
+        self.poland_cities = POLAND_CITIES
 
         self.city_label = QLabel("Select city name: ", self)
         self.city_list = QComboBox(self)
@@ -52,10 +34,10 @@ class WorldWeather(QWidget):
         self.press_icon_label = QLabel(self)
         self.hum_icon_label = QLabel(self)
 
-        self.temp_icon_label.setPixmap(QIcon("icons/outside.png").pixmap(70, 70))
-        self.wind_icon_label.setPixmap(QIcon("icons/wind_icon.png").pixmap(70, 70))
-        self.press_icon_label.setPixmap(QIcon("icons/meter.png").pixmap(70, 70))
-        self.hum_icon_label.setPixmap(QIcon("icons/humidity.png").pixmap(70, 70))
+        self.temp_icon_label.setPixmap(self.pixmaps.pixmap("icons/outside.png", 70, 70))
+        self.wind_icon_label.setPixmap(self.pixmaps.pixmap("icons/wind_icon.png", 70, 70))
+        self.press_icon_label.setPixmap(self.pixmaps.pixmap("icons/meter.png", 70, 70))
+        self.hum_icon_label.setPixmap(self.pixmaps.pixmap("icons/humidity.png", 70, 70))
 
         self.icon_labels = [self.temp_icon_label, self.wind_icon_label, self.press_icon_label, self.hum_icon_label, self.weather_icon_label]
 
@@ -72,13 +54,16 @@ class WorldWeather(QWidget):
         self.back_button = QPushButton("Main menu", self)
         self.get_weather_button = QPushButton("Check Weather!", self)
         self.choose_region_button = QPushButton(self)
-        self.choose_region_button.setIcon(QIcon("icons/poland.png"))
+        self.choose_region_button.setIcon(self.pixmaps.icon("icons/poland.png"))
         self.choose_region_button.setIconSize(QSize(90, 40))
 
 
         self.back_button.clicked.connect(self.close)
         self.get_weather_button.clicked.connect(self.get_weather)
         self.choose_region_button.clicked.connect(self.choosing_region)
+        self.client.weather_ready.connect(self.weather_received)
+        self.client.icon_ready.connect(self.icon_received)
+        self.client.error.connect(self.error_received)
 
         self.init_ui()
         self.styling()
@@ -140,11 +125,11 @@ class WorldWeather(QWidget):
     def choosing_region(self):
         self.poland_selected = not self.poland_selected
         if self.poland_selected:
-            self.choose_region_button.setIcon(QIcon("icons/poland.png"))
+            self.choose_region_button.setIcon(self.pixmaps.icon("icons/poland.png"))
             self.city_list.clear()
             self.city_list.addItems(self.poland_cities)
         else:
-            self.choose_region_button.setIcon(QIcon("icons/earth.png"))
+            self.choose_region_button.setIcon(self.pixmaps.icon("icons/earth.png"))
             self.city_list.clear()
             self.city_list.addItems(self.world_capitals)
 
@@ -188,51 +173,25 @@ class WorldWeather(QWidget):
 
 
     def get_weather(self):
-        """Downloads info through api key and manages possible errors"""
-        load_dotenv("keys.env")
-        api_key = os.getenv("API_KEY")
-        city_name = self.city_list.currentText()
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city_name}&appid={api_key}"
-
-        try:
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-            if data["cod"] == 200:
-                self.check_weather(data)
-        except requests.exceptions.HTTPError:
-            match response.status_code:
-                case 401:
-                    self.error_message("Unauthorized")
-                case 403:
-                    self.error_message("Acces is denied")
-                case 500:
-                    self.error_message("Internal server Error")
-                case 502:
-                    self.error_message("Bad Gateway")
-                case 503:
-                    self.error_message("Server is down")
-                case _:
-                    self.error_message("HTTP error")
-
-        except requests.exceptions.ConnectionError:
-            self.error_message("No internter connection ")
-        except requests.exceptions.Timeout:
-            self.error_message("Timeout Error")
-        except requests.exceptions.TooManyRedirects:
-            self.error_message("Too many redirects")
-        except requests.exceptions.RequestException:
-            self.error_message("Request Error")
+        """Requests weather for the chosen city; the answer arrives through the client's signals"""
+        self.requested_city = self.city_list.currentText()
+        self.client.fetch(self.requested_city)
 
+    def weather_received(self, city_name, data):
+        if city_name == self.requested_city:
+            self.check_weather(data)
+
+    def icon_received(self, icon, content):
+        if icon == self.requested_icon:
+            self.weather_icon_label.setPixmap(self.pixmaps.weather_pixmap(icon, content))
+
+    def error_received(self, city_name, message):
+        if city_name == self.requested_city:
+            self.error_message(message)
 
     def check_weather(self, data):
         """Displays weather for the chosen city"""
-        icon = str(data["weather"][0]["icon"])
-        emoji_link = f"https://openweathermap.org/img/wn/{icon}@2x.png"
-        downloaded_emoji = requests.get(emoji_link)
-        pixmap = QPixmap()
-        pixmap.loadFromData(downloaded_emoji.content)
-
+        self.requested_icon = str(data["weather"][0]["icon"])
         temp_in_celcius = round(data["main"]["temp"] - 273.15, 2)
         weather_description = str(data["weather"][0]["description"])
         capitalized = weather_description.capitalize()
@@ -243,7 +202,6 @@ class WorldWeather(QWidget):
         self.pressure_label.setText(str(data["main"]["pressure"]) + " hpa")
 
         self.weather_description.setText(capitalized)
-        self.weather_icon_label.setPixmap(pixmap)
 
     def error_message(self, message):
         self.weather_description.setText(message)